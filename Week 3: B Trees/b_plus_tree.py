@@ -0,0 +1,295 @@
+'''
+This is an implementation of a B+ tree with search, insert, delete and range operations. Unlike BTree, the values
+are kept only in the leaves, and the keys in internal nodes are copies that just route a search to the right child.
+Each leaf links to the next leaf in key order, so an ordered scan descends to its first key once and then walks
+along the leaves, taking O(log n + k) time for k keys and no memory beyond the current leaf
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import time
+from bisect import bisect_left, bisect_right
+
+from b_tree import BTree
+
+class BPlusNode():
+    def __init__(self, leaf = False):
+        '''
+        This method initializes a node with keys and, for an internal node, children or, for a leaf, values in key
+        order and the next leaf
+        '''
+        self.keys = []
+        self.child = []
+        self.values = []
+        self.next = None
+        self.leaf = leaf
+
+    def isLeaf(self):
+        '''
+        This method returns true if n is a leaf, and false otherwise
+        '''
+        return self.leaf
+
+    def get_num_keys(self):
+        '''
+        This method returns the number of keys associated with a given node
+        '''
+        return len(self.keys)
+
+    def isFull(self, t):
+        '''
+        This method returns true if a node is full and false otherwise
+        '''
+        return self.get_num_keys() == 2 * t - 1
+
+class BPlusTree():
+    def __init__(self, t):
+        '''
+        This method initializes an empty tree of minimum degree t
+        '''
+        self.root = BPlusNode(True)
+        self.t = t
+        self.num_entries = 0
+
+    def __len__(self):
+        return self.num_entries
+
+    def find_leaf(self, k):
+        '''
+        Returns the leaf that key k is in, or would be in. A key equal to a routing key is in the right child
+        '''
+        x = self.root
+        while not x.leaf:
+            x = x.child[bisect_right(x.keys, k)]
+        return x
+
+    def search(self, k):
+        '''
+        This method returns the value stored in the tree at key k, or None if no such key is found
+        '''
+        leaf = self.find_leaf(k)
+        i = bisect_left(leaf.keys, k)
+        if i < len(leaf.keys) and leaf.keys[i] == k:
+            return leaf.values[i]
+        return None
+
+    def split_child(self, parent_node, index):
+        '''
+        Splits the full child at index in two and adds a routing key for the new right half to parent_node. A leaf
+        keeps its first t keys and the first key of the new leaf is copied up, while an internal node moves its
+        middle key up
+        '''
+        t = self.t
+        y = parent_node.child[index]
+        z = BPlusNode(y.leaf)
+
+        if y.leaf:
+            z.keys = y.keys[t:]
+            z.values = y.values[t:]
+            y.keys = y.keys[:t]
+            y.values = y.values[:t]
+            z.next = y.next
+            y.next = z
+            separator = z.keys[0]
+        else:
+            separator = y.keys[t - 1]
+            z.keys = y.keys[t:]
+            z.child = y.child[t:]
+            y.keys = y.keys[:t - 1]
+            y.child = y.child[:t]
+
+        parent_node.keys.insert(index, separator)
+        parent_node.child.insert(index + 1, z)
+
+    def insert(self, k, v):
+        '''
+        This method inserts value v in the tree at key k, overwriting any existing value at the same key. Full nodes
+        are split on the way down, so there is always room for a split below
+        '''
+        if self.root.isFull(self.t):
+            temp = BPlusNode()
+            temp.child.append(self.root)
+            self.root = temp
+            self.split_child(temp, 0)
+
+        x = self.root
+        while not x.leaf:
+            i = bisect_right(x.keys, k)
+            if x.child[i].isFull(self.t):
+                self.split_child(x, i)
+                if k >= x.keys[i]:
+                    i += 1
+            x = x.child[i]
+
+        i = bisect_left(x.keys, k)
+        if i < len(x.keys) and x.keys[i] == k:
+            x.values[i] = v
+        else:
+            x.keys.insert(i, k)
+            x.values.insert(i, v)
+            self.num_entries += 1
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists. A child with only t - 1 keys gets a key from a sibling, or is
+        merged with one, before the search goes down to it, so removing a key from the leaf never leaves it too small.
+        Routing keys of deleted keys can stay in internal nodes, since they still separate the children correctly
+        '''
+        x = self.root
+        while not x.leaf:
+            i = bisect_right(x.keys, k)
+            if x.child[i].get_num_keys() < self.t:
+                self.fill_child(x, i)
+                i = bisect_right(x.keys, k)
+            x = x.child[i]
+
+        i = bisect_left(x.keys, k)
+        if i < len(x.keys) and x.keys[i] == k:
+            x.keys.pop(i)
+            x.values.pop(i)
+            self.num_entries -= 1
+
+        while not self.root.leaf and not self.root.keys:
+            self.root = self.root.child[0]
+
+    def fill_child(self, node, index):
+        '''
+        Gives the child of node at index at least t keys, by moving one over from a sibling that has a key to spare
+        or by merging it with a sibling
+        '''
+        t = self.t
+        child_node = node.child[index]
+
+        if index > 0 and node.child[index - 1].get_num_keys() >= t:
+            lsnode = node.child[index - 1]
+            if child_node.leaf:
+                child_node.keys.insert(0, lsnode.keys.pop())
+                child_node.values.insert(0, lsnode.values.pop())
+                node.keys[index - 1] = child_node.keys[0]
+            else:
+                child_node.keys.insert(0, node.keys[index - 1])
+                node.keys[index - 1] = lsnode.keys.pop()
+                child_node.child.insert(0, lsnode.child.pop())
+
+        elif index + 1 < len(node.child) and node.child[index + 1].get_num_keys() >= t:
+            rsnode = node.child[index + 1]
+            if child_node.leaf:
+                child_node.keys.append(rsnode.keys.pop(0))
+                child_node.values.append(rsnode.values.pop(0))
+                node.keys[index] = rsnode.keys[0]
+            else:
+                child_node.keys.append(node.keys[index])
+                node.keys[index] = rsnode.keys.pop(0)
+                child_node.child.append(rsnode.child.pop(0))
+
+        elif index + 1 < len(node.child):
+            self.merge_children(node, index)
+        else:
+            self.merge_children(node, index - 1)
+
+    def merge_children(self, node, index):
+        '''
+        Merges the child of node at index + 1 into the child at index and drops the routing key between them
+        '''
+        left = node.child[index]
+        right = node.child[index + 1]
+        if left.leaf:
+            left.keys += right.keys
+            left.values += right.values
+            left.next = right.next
+        else:
+            left.keys += [node.keys[index]] + right.keys
+            left.child += right.child
+        node.keys.pop(index)
+        node.child.pop(index + 1)
+
+    def items(self, start = None):
+        '''
+        Yields every key value pair in the tree in key order, starting from the first key at or after start if it
+        is given. The tree is descended once and the rest of the pairs are read along the leaves, so the tree must
+        not be changed while the pairs are being read
+        '''
+        if start is None:
+            leaf = self.root
+            while not leaf.leaf:
+                leaf = leaf.child[0]
+            i = 0
+        else:
+            leaf = self.find_leaf(start)
+            i = bisect_left(leaf.keys, start)
+
+        while leaf is not None:
+            keys, values = leaf.keys, leaf.values
+            while i < len(keys):
+                yield keys[i], values[i]
+                i += 1
+            leaf = leaf.next
+            i = 0
+
+    def range(self, lo, hi):
+        '''
+        Yields the key value pairs with lo <= key < hi in key order
+        '''
+        for k, v in self.items(lo):
+            if k >= hi:
+                return
+            yield k, v
+
+    def print_tree(self, x = None, l = 0):
+        '''
+        Prints the tree one node per line, indented by level
+        '''
+        if x is None:
+            x = self.root
+        if x.leaf:
+            print('    ' * l + 'Leaf', list(zip(x.keys, x.values)))
+        else:
+            print('    ' * l + 'Level', l, x.keys)
+            for child in x.child:
+                self.print_tree(child, l + 1)
+
+def compare_range_scans(num_keys = 10**6, selectivity = .01, num_queries = 20, t = 32):
+    '''
+    Prints the time of range queries that each return selectivity of num_keys random keys, read along the leaves
+    of a BPlusTree and, as the only way BTree can give keys in order, by filtering BTree.items()
+    '''
+    rng = random.Random(0)
+    keys = rng.sample(range(num_keys * 100), num_keys)
+    sorted_keys = sorted(keys)
+    width = int(num_keys * selectivity)
+    queries = []
+    for i in range(num_queries):
+        first = rng.randrange(num_keys - width)
+        queries.append((sorted_keys[first], sorted_keys[first + width]))
+
+    for name, tree in [('BPlusTree', BPlusTree(t)), ('BTree', BTree(t))]:
+        start = time.perf_counter()
+        for k in keys:
+            tree.insert(k, k)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for lo, hi in queries:
+            if isinstance(tree, BPlusTree):
+                found = sum(1 for pair in tree.range(lo, hi))
+            else:
+                found = sum(1 for k, v in tree.items() if lo <= k < hi)
+            assert found == width
+        query_seconds = time.perf_counter() - start
+
+        print('%s: loaded %d keys in %.1fs, %.2fms per range query of %d keys'
+              % (name, num_keys, load_seconds, query_seconds / num_queries * 1000, width))
+
+if __name__ == "__main__":
+    tree1 = BPlusTree(2)
+    for i, value in enumerate('abcdefghij'):
+        tree1.insert(8 + i, value)
+    tree1.insert(10, 'replaced')
+    tree1.delete(14)
+    print(tree1.search(10))
+    print(tree1.search(14))
+    print(list(tree1.range(9, 13)))
+    print(list(tree1.items(start = 15)))
+    tree1.print_tree()
+
+    compare_range_scans()
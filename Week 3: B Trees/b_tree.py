@@ -51,9 +51,20 @@ class Node():
     #         return "Internal BTreeNode with {0} keys, {1} children\n\tK:{2}\n\n".format(len(self.keys), len(self.child), self.keys, self.child)
 
 class BTree():
-    def __init__(self, t):
-        self.root = Node(True)
+    def __init__(self, t, bloom_filter = None):
+        '''
+        This method initializes an empty tree of minimum degree t. bloom_filter is an optional empty filter from
+        Week 4's bloom_filter.py that searches check first, so most searches for missing keys skip the walk down the tree
+        '''
+        self.root = self.new_node(True)
         self.t = t
+        self.bloom_filter = bloom_filter
+
+    def new_node(self, leaf = False):
+        '''
+        Returns a new empty node. Every node the tree makes comes from here, so a subclass can store nodes elsewhere
+        '''
+        return Node(leaf)
         
     def indexFound(self, node, index, key):
         return (index < node.get_num_keys() and node.keys[index] == key)
@@ -80,7 +91,7 @@ class BTree():
         '''
         t = self.t
         y = parent_node.child[index]
-        z = Node(y.leaf)
+        z = self.new_node(y.leaf)
         y_key_val_dict = copy.copy(y.key_val_dict)
         parent_key_val_dict = copy.copy(parent_node.key_val_dict)       
         
@@ -91,9 +102,9 @@ class BTree():
 
         parent_node.key_val_dict.clear()
         for key in parent_node.keys:
-            if y_key_val_dict.get(key):
+            if key in y_key_val_dict:
                 parent_node.key_val_dict[key] = y_key_val_dict[key]
-            elif parent_key_val_dict.get(key):
+            elif key in parent_key_val_dict:
                 parent_node.key_val_dict[key] = parent_key_val_dict[key]
 
         for key in z.keys:
@@ -106,7 +117,7 @@ class BTree():
 
         if not y.leaf:
             z.child = y.child[t : 2 * t]
-            y.child = y.child[0 : t - 1]
+            y.child = y.child[0 : t]
 
     def insert(self, k, v):
         '''
@@ -122,7 +133,7 @@ class BTree():
                 return
         
         if root.isFull(self.t):
-            temp = Node()
+            temp = self.new_node()
             self.root = temp
             temp.child.insert(0, root)
             self.split_child(temp, 0)
@@ -131,6 +142,11 @@ class BTree():
         else:
             self.insert_nonfull(root, k, v)
 
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(k)
+            if self.bloom_filter.needs_rebuild():
+                self.bloom_filter.rebuild(key for key, value in self.items())
+
     def insert_nonfull(self, x, k, v):
         '''
         if a node is not full, insert key and value in that node in correct location, rearranging the tree accordingly
@@ -143,7 +159,6 @@ class BTree():
                 i -= 1
             x.keys[i + 1] = k
             x.key_val_dict[k] = v
-            self.print_tree(self.root)
         else:
             while i >= 0 and k < x.keys[i]:
                 i -= 1
@@ -167,6 +182,10 @@ class BTree():
             i = 0
             while i < node_to_delete.get_num_keys() and k > node_to_delete.keys[i]:
                 i += 1
+            if self.bloom_filter is not None:
+                self.bloom_filter.note_delete()
+                if self.bloom_filter.needs_rebuild():
+                    self.bloom_filter.rebuild(key for key, value in self.items() if key != k)
             if node_to_delete.leaf:
                 if self.indexFound(node_to_delete, i, k):
                     node_to_delete.key_val_dict.pop(node_to_delete.keys[i])
@@ -328,24 +347,33 @@ class BTree():
         '''
         This method returns the Node stored in the tree associated with key k, or None if no such key is found
         '''
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(k):
+            return None
 
-        i = 0
         x = self.root
-        while i < x.get_num_keys() and k >= x.keys[i]:
-            
-            if k == x.keys[i]:
-                return x
+        while True:
+            i = 0
+            while i < x.get_num_keys() and k > x.keys[i]:
+                i += 1
 
-            i += 1
-           
-            if i >= x.get_num_keys() or k < x.keys[i-1]:
-                if x.child:
-                    x = x.child[i]
-                    i = 0
-                else:
-                    return None
-
-        return None
+            if i < x.get_num_keys() and k == x.keys[i]:
+                return x
+            if x.leaf:
+                return None
+            x = x.child[i]
+
+    def items(self, x = None):
+        '''
+        Yields every key value pair in the tree, in key order
+        '''
+        if x is None:
+            x = self.root
+        for i, key in enumerate(x.keys):
+            if not x.leaf:
+                yield from self.items(x.child[i])
+            yield key, x.key_val_dict[key]
+        if not x.leaf:
+            yield from self.items(x.child[-1])
 
     def print_tree(self, x, l = 0):
         '''
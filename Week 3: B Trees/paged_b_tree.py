@@ -0,0 +1,625 @@
+'''
+This is a B tree whose nodes are stored as fixed size pages in a single file, for trees that do not fit in memory.
+Page 0 is a header with the tree's minimum degree and root page, and every other page holds one node: its keys,
+its values in key order and the page numbers of its children. A buffer pool keeps the most recently used pages in
+memory as nodes and writes a page back only when it is evicted or flushed and its node no longer serializes to the
+bytes that were read. BTree's own insert and search run unchanged on top, since the nodes look the same to them,
+while delete is done in a single pass down the tree that only ever changes nodes on its path; the pages an operation
+touches stay pinned in the pool until it finishes, so a node it is changing is never evicted and read back as a
+second copy
+
+Pages are written in a fixed binary encoding rather than with pickle, so opening a tree file from somewhere else can
+at worst fail with ValueError, never run code. Keys and values can be None, bools, ints, floats, strs, bytes, and
+tuples and lists of these
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import os
+import random
+import struct
+import tempfile
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from b_tree import BTree, Node
+
+MAGIC = b'BTREEPG2'
+# magic, page size, minimum degree, root page, number of pages
+HEADER = struct.Struct('<8sIIQQ')
+# each node page starts with the length of the node's serialized bytes
+LENGTH = struct.Struct('<I')
+# leaf flag, number of keys and number of children, followed by the children's page numbers and then each key and
+# its value encoded by encode_item
+NODE = struct.Struct('<BII')
+PAGE_ID = struct.Struct('<Q')
+INT64 = struct.Struct('<q')
+FLOAT64 = struct.Struct('<d')
+# every encoded item starts with one of these tags, and those of variable length then give their length or count
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_BIG_INT, TAG_FLOAT, TAG_STR, TAG_BYTES, TAG_TUPLE, TAG_LIST = b'NFTiIfsbtl'
+
+def encode_item(obj, out):
+    '''
+    This method appends the encoding of obj to the bytearray out, raising TypeError for a type pages cannot hold
+    '''
+    if obj is None:
+        out.append(TAG_NONE)
+    elif obj is True or obj is False:
+        out.append(TAG_TRUE if obj else TAG_FALSE)
+    elif type(obj) is int:
+        if -(1 << 63) <= obj < 1 << 63:
+            out.append(TAG_INT)
+            out += INT64.pack(obj)
+        else:
+            data = obj.to_bytes((obj.bit_length() + 8) // 8, 'little', signed = True)
+            out.append(TAG_BIG_INT)
+            out += LENGTH.pack(len(data)) + data
+    elif type(obj) is float:
+        out.append(TAG_FLOAT)
+        out += FLOAT64.pack(obj)
+    elif type(obj) is str:
+        data = obj.encode('utf-8', 'surrogatepass')
+        out.append(TAG_STR)
+        out += LENGTH.pack(len(data)) + data
+    elif type(obj) in (bytes, bytearray):
+        out.append(TAG_BYTES)
+        out += LENGTH.pack(len(obj)) + obj
+    elif type(obj) in (tuple, list):
+        out.append(TAG_TUPLE if type(obj) is tuple else TAG_LIST)
+        out += LENGTH.pack(len(obj))
+        for elem in obj:
+            encode_item(elem, out)
+    else:
+        raise TypeError('paged B tree keys and values cannot be of type %s' % type(obj).__name__)
+
+def decode_item(data, offset):
+    '''
+    Returns the item encoded in data at offset and the offset just past it, raising ValueError if data is not a
+    valid encoding
+    '''
+    if offset >= len(data):
+        raise ValueError('page ends in the middle of an item')
+    tag = data[offset]
+    offset += 1
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_FALSE or tag == TAG_TRUE:
+        return tag == TAG_TRUE, offset
+    if tag == TAG_INT:
+        return INT64.unpack_from(data, offset)[0], offset + INT64.size
+    if tag == TAG_FLOAT:
+        return FLOAT64.unpack_from(data, offset)[0], offset + FLOAT64.size
+    if tag not in (TAG_BIG_INT, TAG_STR, TAG_BYTES, TAG_TUPLE, TAG_LIST):
+        raise ValueError('unknown item tag %d' % tag)
+
+    length = LENGTH.unpack_from(data, offset)[0]
+    offset += LENGTH.size
+    if tag == TAG_TUPLE or tag == TAG_LIST:
+        items = []
+        for i in range(length):
+            item, offset = decode_item(data, offset)
+            items.append(item)
+        return (tuple(items) if tag == TAG_TUPLE else items), offset
+
+    end = offset + length
+    if end > len(data):
+        raise ValueError('page ends in the middle of an item')
+    chunk = bytes(data[offset:end])
+    if tag == TAG_BIG_INT:
+        return int.from_bytes(chunk, 'little', signed = True), end
+    if tag == TAG_STR:
+        return chunk.decode('utf-8', 'surrogatepass'), end
+    return chunk, end
+
+def pop_key(node, index):
+    '''
+    Removes the key at index from node and returns it with its value
+    '''
+    k = node.keys.pop(index)
+    return k, node.key_val_dict.pop(k)
+
+def put_key(node, index, k, v):
+    '''
+    Inserts key k with value v into node at index
+    '''
+    node.keys.insert(index, k)
+    node.key_val_dict[k] = v
+
+class ChildList():
+    '''
+    The children of a PagedNode, stored as page numbers and read through the pager when BTree asks for a child.
+    It supports the list operations BTree uses on node.child
+    '''
+    def __init__(self, pager, page_ids):
+        self.pager = pager
+        self.page_ids = page_ids
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChildList(self.pager, self.page_ids[index])
+        return self.pager.get_node(self.page_ids[index])
+
+    def __iter__(self):
+        for page_id in list(self.page_ids):
+            yield self.pager.get_node(page_id)
+
+    def insert(self, index, node):
+        self.page_ids.insert(index, node.page_id)
+
+    def append(self, node):
+        self.page_ids.append(node.page_id)
+
+    def pop(self, index = -1):
+        return self.pager.get_node(self.page_ids.pop(index))
+
+class PagedNode(Node):
+    def __init__(self, pager, page_id, leaf = False):
+        '''
+        This method initializes an empty node stored in page page_id. stored holds the bytes the page had when it
+        was read or last written, or None if the page was never written
+        '''
+        self.pager = pager
+        self.page_id = page_id
+        self.stored = None
+        super().__init__(leaf)
+
+    @property
+    def child(self):
+        return self.child_list
+
+    @child.setter
+    def child(self, children):
+        if isinstance(children, ChildList):
+            self.child_list = ChildList(self.pager, list(children.page_ids))
+        else:
+            self.child_list = ChildList(self.pager, [node.page_id for node in children])
+
+    def serialize(self):
+        '''
+        Returns the bytes of the node's page: whether it is a leaf, its numbers of keys and children, its children's
+        page numbers, and each key followed by its value
+        '''
+        page_ids = self.child_list.page_ids
+        out = bytearray(NODE.pack(self.leaf, len(self.keys), len(page_ids)))
+        for page_id in page_ids:
+            out += PAGE_ID.pack(page_id)
+        items = [None] * (2 * len(self.keys))
+        items[0::2] = self.keys
+        items[1::2] = map(self.key_val_dict.__getitem__, self.keys)
+        if set(map(type, items)) == {int}:
+            # the same bytes encode_item gives, packed in one call for the common node of int keys and values
+            parts = [TAG_INT] * (2 * len(items))
+            parts[1::2] = items
+            try:
+                return bytes(out + struct.pack('<' + 'Bq' * len(items), *parts))
+            except struct.error:
+                # an int too large for 64 bits
+                pass
+        for item in items:
+            encode_item(item, out)
+        return bytes(out)
+
+class Pager():
+    def __init__(self, path, page_size = 4096, t = None, pool_pages = 64):
+        '''
+        This method opens the page file at path, creating it with minimum degree t if it does not exist, and keeps
+        up to pool_pages unpinned pages in its buffer pool
+        '''
+        self.path = path
+        self.pool_pages = pool_pages
+        # page number to node, least recently used first
+        self.pool = OrderedDict()
+        self.pinned = set()
+        self.depth = 0
+        self.writing = False
+        self.page_reads = 0
+        self.page_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(path):
+            self.file = open(path, 'r+b')
+            magic, self.page_size, self.t, self.root_page, self.num_pages = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError('not a paged B tree file: ' + path)
+            self.created = False
+        else:
+            if t is None:
+                raise ValueError('t is needed to create a paged B tree file')
+            self.file = open(path, 'w+b')
+            self.page_size = page_size
+            self.t = t
+            self.root_page = 0
+            self.num_pages = 1
+            self.created = True
+
+    def begin(self, writing = False):
+        '''
+        This method starts an operation. Pages read until the matching end stay in the pool, and if the operation
+        is writing, end checks that their nodes still fit in a page
+        '''
+        self.depth += 1
+        self.writing = self.writing or writing
+
+    def end(self):
+        '''
+        This method ends an operation, unpinning its pages once the outermost operation ends and evicting down to
+        pool_pages. A node that no longer fits in its page raises ValueError here, from the operation that grew it,
+        rather than from whichever later operation evicts it
+        '''
+        self.depth -= 1
+        if self.depth == 0:
+            changed = [self.pool[page_id] for page_id in self.pinned] if self.writing else []
+            self.writing = False
+            self.pinned.clear()
+            for node in changed:
+                self.check_fits(node.serialize())
+            self.evict()
+
+    def evict(self):
+        '''
+        This method writes back and drops the least recently used unpinned pages until the pool is within pool_pages
+        '''
+        if len(self.pool) <= self.pool_pages:
+            return
+        for page_id in list(self.pool):
+            if len(self.pool) <= self.pool_pages:
+                break
+            if page_id not in self.pinned:
+                # written back before it is dropped, so a page that cannot be written stays in the pool
+                self.write_back(self.pool[page_id])
+                del self.pool[page_id]
+
+    def new_node(self, leaf = False):
+        '''
+        Returns a new empty node in a new page at the end of the file
+        '''
+        node = PagedNode(self, self.num_pages, leaf)
+        self.num_pages += 1
+        self.add_to_pool(node)
+        return node
+
+    def get_node(self, page_id):
+        '''
+        Returns the node in page page_id, from the pool if it is there and otherwise read from the file
+        '''
+        node = self.pool.get(page_id)
+        if node is not None:
+            self.hits += 1
+            self.pool.move_to_end(page_id)
+            if self.depth:
+                self.pinned.add(page_id)
+            return node
+
+        self.misses += 1
+        node = self.read_page(page_id)
+        self.add_to_pool(node)
+        return node
+
+    def add_to_pool(self, node):
+        '''
+        This method puts node in the pool, pinned if an operation is running
+        '''
+        self.pool[node.page_id] = node
+        if self.depth:
+            self.pinned.add(node.page_id)
+        else:
+            self.evict()
+
+    def read_page(self, page_id):
+        '''
+        Returns a node made from page page_id of the file, raising ValueError if the page is not a valid node
+        '''
+        if not 0 < page_id < self.num_pages:
+            raise ValueError('page %d of %s is out of range, the file is corrupt' % (page_id, self.path))
+        self.file.seek(page_id * self.page_size)
+        page = self.file.read(self.page_size)
+        self.page_reads += 1
+
+        try:
+            length = LENGTH.unpack_from(page)[0]
+            data = page[LENGTH.size:LENGTH.size + length]
+            leaf, num_keys, num_children = NODE.unpack_from(data)
+            offset = NODE.size
+            page_ids = [PAGE_ID.unpack_from(data, offset + i * PAGE_ID.size)[0] for i in range(num_children)]
+            offset += num_children * PAGE_ID.size
+            node = PagedNode(self, page_id, bool(leaf))
+            for i in range(num_keys):
+                key, offset = decode_item(data, offset)
+                value, offset = decode_item(data, offset)
+                node.keys.append(key)
+                node.key_val_dict[key] = value
+        except (struct.error, UnicodeDecodeError, RecursionError, TypeError) as e:
+            raise ValueError('page %d of %s is corrupt: %s' % (page_id, self.path, e))
+        node.child_list.page_ids = page_ids
+        node.stored = data
+        return node
+
+    def write_back(self, node):
+        '''
+        This method writes node to its page if it changed since it was read or last written
+        '''
+        data = node.serialize()
+        if data == node.stored:
+            return
+        self.check_fits(data)
+
+        self.file.seek(node.page_id * self.page_size)
+        self.file.write((LENGTH.pack(len(data)) + data).ljust(self.page_size, b'\0'))
+        self.page_writes += 1
+        node.stored = data
+
+    def check_fits(self, data):
+        '''
+        This method raises ValueError if a node serialized to data does not fit in a page
+        '''
+        if LENGTH.size + len(data) > self.page_size:
+            raise ValueError('node of %d bytes does not fit in a %d byte page, use a smaller t or larger page_size'
+                             % (len(data), self.page_size))
+
+    def flush(self):
+        '''
+        This method writes back every changed page in the pool and the header
+        '''
+        for node in self.pool.values():
+            self.write_back(node)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, self.page_size, self.t, self.root_page, self.num_pages).ljust(self.page_size, b'\0'))
+        self.file.flush()
+
+    def close(self):
+        '''
+        This method flushes and closes the file
+        '''
+        self.flush()
+        self.file.close()
+
+class PagedBTree(BTree):
+    def __init__(self, path, t = 32, pool_pages = 64, page_size = 4096, bloom_filter = None):
+        '''
+        This method opens the tree stored in the file at path, or creates an empty tree of minimum degree t there.
+        The buffer pool holds pool_pages pages, and each node must serialize to less than page_size bytes
+        '''
+        self.pager = Pager(path, page_size, t, pool_pages)
+        self.operations = 0
+        if self.pager.created:
+            super().__init__(t, bloom_filter)
+        else:
+            self.t = self.pager.t
+            self.bloom_filter = bloom_filter
+            if bloom_filter is not None:
+                bloom_filter.rebuild(key for key, value in self.items())
+
+    @property
+    def root(self):
+        return self.pager.get_node(self.pager.root_page)
+
+    @root.setter
+    def root(self, node):
+        self.pager.root_page = node.page_id
+
+    def new_node(self, leaf = False):
+        return self.pager.new_node(leaf)
+
+    def insert(self, k, v):
+        '''
+        This method inserts value v in the tree at key k, overwriting any existing value at the same key. Raises
+        TypeError before changing anything if k or v is of a type pages cannot hold
+        '''
+        encode_item((k, v), bytearray())
+        self.operations += 1
+        self.pager.begin(True)
+        try:
+            super().insert(k, v)
+        finally:
+            self.pager.end()
+
+    def search(self, k):
+        self.operations += 1
+        self.pager.begin()
+        try:
+            return super().search(k)
+        finally:
+            self.pager.end()
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, in one pass down from the root. A child with only t - 1 keys
+        gets a key from a sibling, or is merged with one, before the pass goes down to it, so the key can be taken
+        out of a leaf without leaving it too small. The pages of merged away nodes are not reused
+        '''
+        self.operations += 1
+        self.pager.begin(True)
+        try:
+            found = self.search_return_node(k) is not None
+            if found:
+                self.delete_key(k)
+        finally:
+            self.pager.end()
+
+        if found and self.bloom_filter is not None:
+            self.bloom_filter.note_delete()
+            if self.bloom_filter.needs_rebuild():
+                self.bloom_filter.rebuild(key for key, value in self.items())
+
+    def delete_key(self, k):
+        '''
+        This method removes key k, which must be in the tree. A key in an internal node is swapped for its
+        predecessor or successor from a child that can spare a key, which is then deleted from that child, or else
+        the two children around it are merged and the key is deleted from the merged child
+        '''
+        t = self.t
+        x = self.root
+        while True:
+            i = bisect_left(x.keys, k)
+            if i < len(x.keys) and x.keys[i] == k:
+                if x.leaf:
+                    pop_key(x, i)
+                    break
+
+                left = x.child[i]
+                right = x.child[i + 1]
+                if left.get_num_keys() >= t:
+                    y = left
+                    while not y.leaf:
+                        y = y.child[-1]
+                    replacement = y.keys[-1]
+                    child_node = left
+                elif right.get_num_keys() >= t:
+                    y = right
+                    while not y.leaf:
+                        y = y.child[0]
+                    replacement = y.keys[0]
+                    child_node = right
+                else:
+                    self.merge_children(x, i)
+                    x = left
+                    continue
+
+                pop_key(x, i)
+                put_key(x, i, replacement, y.key_val_dict[replacement])
+                x = child_node
+                k = replacement
+                continue
+
+            if x.child[i].get_num_keys() < t:
+                self.fill_child(x, i)
+                i = bisect_left(x.keys, k)
+            x = x.child[i]
+
+        root = self.root
+        if not root.leaf and not root.keys:
+            self.root = root.child[0]
+
+    def fill_child(self, node, index):
+        '''
+        Gives the child of node at index at least t keys, by moving a key through node from a sibling that has one
+        to spare or by merging it with a sibling
+        '''
+        t = self.t
+        child_node = node.child[index]
+
+        if index > 0 and node.child[index - 1].get_num_keys() >= t:
+            lsnode = node.child[index - 1]
+            put_key(child_node, 0, *pop_key(node, index - 1))
+            put_key(node, index - 1, *pop_key(lsnode, -1))
+            if not lsnode.leaf:
+                child_node.child.page_ids.insert(0, lsnode.child.page_ids.pop())
+
+        elif index + 1 < len(node.child) and node.child[index + 1].get_num_keys() >= t:
+            rsnode = node.child[index + 1]
+            put_key(child_node, len(child_node.keys), *pop_key(node, index))
+            put_key(node, index, *pop_key(rsnode, 0))
+            if not rsnode.leaf:
+                child_node.child.page_ids.append(rsnode.child.page_ids.pop(0))
+
+        elif index + 1 < len(node.child):
+            self.merge_children(node, index)
+        else:
+            self.merge_children(node, index - 1)
+
+    def merge_children(self, node, index):
+        '''
+        Merges the child of node at index + 1 and the key between them into the child at index
+        '''
+        left = node.child[index]
+        right = node.child[index + 1]
+        put_key(left, len(left.keys), *pop_key(node, index))
+        left.keys += right.keys
+        left.key_val_dict.update(right.key_val_dict)
+        left.child.page_ids += right.child.page_ids
+        node.child.page_ids.pop(index + 1)
+
+    def flush(self):
+        '''
+        This method writes every changed page to the file
+        '''
+        self.pager.flush()
+
+    def close(self):
+        '''
+        This method writes every changed page to the file and closes it
+        '''
+        self.pager.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def stats(self):
+        '''
+        Returns a dictionary of the pages read and written per operation and the buffer pool's hit rate
+        '''
+        pager = self.pager
+        lookups = pager.hits + pager.misses
+        return {
+            'operations': self.operations,
+            'pages': pager.num_pages - 1,
+            'pool_pages': pager.pool_pages,
+            'page_reads': pager.page_reads,
+            'page_writes': pager.page_writes,
+            'reads_per_op': pager.page_reads / self.operations if self.operations else 0,
+            'hit_rate': pager.hits / lookups if lookups else 0
+        }
+
+def compare_pool_sizes(num_keys = 100000, num_searches = 50000, t = 32, pool_fractions = (.1, .5, 1)):
+    '''
+    Prints the page reads per operation, buffer pool hit rate and throughput of loading num_keys random keys and
+    then searching for num_searches of them, with pools holding each fraction of the tree's pages
+    '''
+    rng = random.Random(0)
+    keys = rng.sample(range(2**40), num_keys)
+    searches = [rng.choice(keys) for i in range(num_searches)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sizing.btree')
+        with PagedBTree(path, t, pool_pages = num_keys) as tree:
+            for k in keys:
+                tree.insert(k, k)
+            num_pages = tree.pager.num_pages - 1
+        print('%d keys in %d pages of %d bytes' % (num_keys, num_pages, tree.pager.page_size))
+
+        for fraction in pool_fractions:
+            pool_pages = max(1, int(num_pages * fraction))
+            path = os.path.join(directory, 'tree%d.btree' % pool_pages)
+            with PagedBTree(path, t, pool_pages = pool_pages) as tree:
+                start = time.perf_counter()
+                for k in keys:
+                    tree.insert(k, k)
+                tree.flush()
+                load = tree.stats()
+                load_seconds = time.perf_counter() - start
+
+                tree.operations = tree.pager.page_reads = tree.pager.hits = tree.pager.misses = 0
+                start = time.perf_counter()
+                for k in searches:
+                    tree.search(k)
+                search = tree.stats()
+                search_seconds = time.perf_counter() - start
+
+            print('pool of %d pages: insert %.2f reads/op, hit rate %.3f, %.0f ops/s; search %.2f reads/op, hit rate %.3f, %.0f ops/s'
+                  % (pool_pages, load['reads_per_op'], load['hit_rate'], num_keys / load_seconds,
+                     search['reads_per_op'], search['hit_rate'], num_searches / search_seconds))
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tree1.btree')
+        with PagedBTree(path, 2, pool_pages = 2) as tree1:
+            for i, value in enumerate('abcdefg'):
+                tree1.insert(8 + i, value)
+            tree1.insert(10, 'replaced')
+            tree1.delete(14)
+
+        with PagedBTree(path, pool_pages = 2) as tree1:
+            print(tree1.search(10))
+            print(tree1.search(14))
+            print(list(tree1.items()))
+            tree1.print_tree(tree1.root)
+            print(tree1.stats())
+
+    compare_pool_sizes()
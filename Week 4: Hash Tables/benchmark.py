@@ -0,0 +1,219 @@
+'''
+This is a benchmark harness for the hash tables. Each run loads a table with a workload's keys and then replays the
+workload's operations, timing every operation, and reports ops/sec and per-operation latency percentiles as JSON
+
+Usage:
+    python benchmark.py run [--tables linear,chained] [--workloads uniform,zipf] [--n 100000] [--output run.json]
+    python benchmark.py compare base.json new.json [--threshold 0.1]
+'''
+import argparse
+import json
+import random
+import sys
+import time
+from itertools import accumulate
+
+from cuckoo_hash_table import CuckooHashTable
+from hashtable import HashTable
+from open_hash_table import OpenHashTable
+
+# maps each table name to a function that builds an empty table
+TABLES = {
+    'chained': lambda: HashTable(),
+    'chained incremental': lambda: HashTable(incremental = True),
+    'linear': lambda: OpenHashTable(probe = 'linear'),
+    'quadratic': lambda: OpenHashTable(probe = 'quadratic'),
+    'double hashing': lambda: OpenHashTable(probe = 'double hashing'),
+    'triangular': lambda: OpenHashTable(probe = 'triangular'),
+    'robin hood': lambda: OpenHashTable(probe = 'robin hood'),
+    'swiss': lambda: OpenHashTable(probe = 'swiss'),
+    'cuckoo': lambda: CuckooHashTable()
+}
+
+def uniform_workload(n, rng, mix):
+    '''
+    Random integer keys, looked up uniformly
+    '''
+    keys = [rng.randrange(2**62) for i in range(n)]
+    return keys, mixed_ops(keys, rng, mix, lambda: rng.choice(keys), lambda: rng.randrange(2**62, 2**63))
+
+def zipf_workload(n, rng, mix, skew = 1.1):
+    '''
+    Random integer keys, looked up with Zipf-distributed popularity so a few keys take most of the reads
+    '''
+    keys = [rng.randrange(2**62) for i in range(n)]
+    cum_weights = list(accumulate(1 / (rank + 1) ** skew for rank in range(n)))
+    popular = iter(rng.choices(keys, cum_weights = cum_weights, k = n))
+    return keys, mixed_ops(keys, rng, mix, lambda: next(popular), lambda: rng.randrange(2**62, 2**63))
+
+def sequential_workload(n, rng, mix):
+    '''
+    The keys 0 to n - 1, which Python hashes to themselves
+    '''
+    keys = list(range(n))
+    return keys, mixed_ops(keys, rng, mix, lambda: rng.randrange(n), lambda: rng.randrange(n, 2 * n))
+
+def string_workload(n, rng, mix):
+    '''
+    Random 16 character string keys
+    '''
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    keys = [''.join(rng.choices(letters, k = 16)) for i in range(n)]
+    return keys, mixed_ops(keys, rng, mix, lambda: rng.choice(keys), lambda: ''.join(rng.choices(letters, k = 17)))
+
+WORKLOADS = {
+    'uniform': uniform_workload,
+    'zipf': zipf_workload,
+    'sequential': sequential_workload,
+    'strings': string_workload
+}
+
+def mixed_ops(keys, rng, mix, existing_key, missing_key):
+    '''
+    Returns len(keys) operations split between searches for existing keys, inserts over existing keys and
+    searches for missing keys in the read, write, miss proportions given by mix
+    '''
+    ops = []
+    for op in rng.choices(['read', 'write', 'miss'], weights = mix, k = len(keys)):
+        if op == 'read':
+            ops.append(('search', existing_key()))
+        elif op == 'write':
+            ops.append(('insert', existing_key()))
+        else:
+            ops.append(('search', missing_key()))
+    return ops
+
+def percentile(sorted_times, p):
+    '''
+    Returns the p-th percentile of a sorted list of times
+    '''
+    if not sorted_times:
+        return 0
+    return sorted_times[min(len(sorted_times) - 1, int(p / 100 * len(sorted_times)))]
+
+def summarize(times):
+    '''
+    Returns ops/sec and latency percentiles in microseconds for a list of per-operation times in nanoseconds
+    '''
+    total = sum(times)
+    times = sorted(times)
+    return {
+        'ops': len(times),
+        'ops_per_sec': len(times) / (total / 1e9) if total else 0,
+        'p50_us': percentile(times, 50) / 1000,
+        'p90_us': percentile(times, 90) / 1000,
+        'p99_us': percentile(times, 99) / 1000,
+        'max_us': times[-1] / 1000 if times else 0
+    }
+
+def run_benchmark(table_name, workload_name, n, seed = 0, mix = (.7, .2, .1)):
+    '''
+    Loads a new table with the workload's n keys and then runs its n mixed operations, returning a summary of each phase
+    '''
+    rng = random.Random(seed)
+    keys, ops = WORKLOADS[workload_name](n, rng, mix)
+    table = TABLES[table_name]()
+    clock = time.perf_counter_ns
+
+    load_times = []
+    for k in keys:
+        start = clock()
+        table.insert(k, k)
+        load_times.append(clock() - start)
+
+    op_times = []
+    for op, k in ops:
+        if op == 'search':
+            start = clock()
+            table.search(k)
+            op_times.append(clock() - start)
+        else:
+            start = clock()
+            table.insert(k, k)
+            op_times.append(clock() - start)
+
+    return {
+        'table': table_name,
+        'workload': workload_name,
+        'n': n,
+        'load': summarize(load_times),
+        'mixed': summarize(op_times)
+    }
+
+def run(tables, workloads, n, seed = 0, mix = (.7, .2, .1)):
+    '''
+    Runs every table against every workload and returns the list of results
+    '''
+    results = []
+    for workload_name in workloads:
+        for table_name in tables:
+            result = run_benchmark(table_name, workload_name, n, seed, mix)
+            results.append(result)
+            print('%-20s %-10s load %10.0f ops/s p99 %7.2fus | mixed %10.0f ops/s p99 %7.2fus' % (
+                table_name, workload_name,
+                result['load']['ops_per_sec'], result['load']['p99_us'],
+                result['mixed']['ops_per_sec'], result['mixed']['p99_us']), file = sys.stderr)
+    return results
+
+def compare(base, new, threshold = .1):
+    '''
+    Compares two lists of results and returns a description of every phase whose ops/sec fell, or whose p99 latency
+    rose, by more than threshold
+    '''
+    base_results = {(result['table'], result['workload']): result for result in base}
+    regressions = []
+
+    for result in new:
+        old = base_results.get((result['table'], result['workload']))
+        if old is None:
+            continue
+        for phase in ['load', 'mixed']:
+            old_phase, new_phase = old[phase], result[phase]
+            if new_phase['ops_per_sec'] < old_phase['ops_per_sec'] * (1 - threshold):
+                regressions.append('%s/%s %s: ops/sec %.0f -> %.0f' % (result['table'], result['workload'], phase,
+                                                                         old_phase['ops_per_sec'], new_phase['ops_per_sec']))
+            if new_phase['p99_us'] > old_phase['p99_us'] * (1 + threshold):
+                regressions.append('%s/%s %s: p99 %.2fus -> %.2fus' % (result['table'], result['workload'], phase,
+                                                                       old_phase['p99_us'], new_phase['p99_us']))
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Benchmark the hash tables')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--tables', default = ','.join(TABLES))
+    run_parser.add_argument('--workloads', default = ','.join(WORKLOADS))
+    run_parser.add_argument('--n', type = int, default = 100000)
+    run_parser.add_argument('--seed', type = int, default = 0)
+    run_parser.add_argument('--mix', default = '.7,.2,.1', help = 'read,write,miss proportions of the mixed phase')
+    run_parser.add_argument('--output', help = 'file to write the JSON results to instead of stdout')
+
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type = float, default = .1)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        mix = [float(part) for part in args.mix.split(',')]
+        results = run(args.tables.split(','), args.workloads.split(','), args.n, args.seed, mix)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent = 2)
+        else:
+            json.dump(results, sys.stdout, indent = 2)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare(base, new, args.threshold)
+    for regression in regressions:
+        print('REGRESSION ' + regression)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
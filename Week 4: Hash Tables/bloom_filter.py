@@ -0,0 +1,220 @@
+'''
+These are Bloom filters that HashTable and BTree can keep next to their entries, so a search for a key that was
+never inserted can return without walking a bucket or a path of nodes. A filter never says an inserted key is
+missing, and says a missing key might be present with probability fp_rate while it holds at most capacity keys.
+Deleted keys cannot be taken out of a filter, so the structure rebuilds its filter from its live keys once enough
+deletes have piled up, or once more keys than capacity have been added
+
+BloomFilter spreads a key's bits over the whole bit array. BlockedBloomFilter puts all of a key's bits in one
+512 bit block, the size of a cache line, which costs a slightly higher false positive rate for the same memory
+but means a lookup only ever reads one block
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import math
+import os
+import random
+import sys
+import time
+
+from hash_functions import FIBONACCI_MULTIPLIER, MASK64
+
+BLOCK_BITS = 512
+
+class BloomFilter():
+    def __init__(self, capacity = 1024, fp_rate = .01, rebuild_ratio = .25, seed = None):
+        '''
+        This method sizes the filter so that capacity keys give a false positive rate of fp_rate. The filter asks to
+        be rebuilt once the deletes since the last rebuild pass rebuild_ratio of the keys added
+        '''
+        if not 0 < fp_rate < 1:
+            raise ValueError('fp_rate must be between 0 and 1')
+
+        self.fp_rate = fp_rate
+        self.rebuild_ratio = rebuild_ratio
+        # a multiply-shift of Python's hash, so int keys, which Python hashes to themselves, get well mixed bits
+        rng = random.Random(seed)
+        self.multiplier = rng.getrandbits(128) | 1
+        self.increment = rng.getrandbits(128)
+        self.allocate(max(capacity, 1))
+
+    def allocate(self, capacity):
+        '''
+        This method replaces the bits with an empty array sized for capacity keys
+        '''
+        self.capacity = capacity
+        self.num_bits = max(8, math.ceil(-capacity * math.log(self.fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.num_added = 0
+        self.num_deleted = 0
+
+    def hash_key(self, k):
+        '''
+        Returns a 64 bit hash of key k
+        '''
+        return (((hash(k) & MASK64) * self.multiplier + self.increment) >> 64) & MASK64
+
+    def positions(self, k):
+        '''
+        Yields the bit positions of key k, made from two halves of one 64 bit hash by double hashing
+        '''
+        h = self.hash_key(k)
+        h1 = h >> 32
+        h2 = (h & 0xFFFFFFFF) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, k):
+        '''
+        This method sets the bits of key k
+        '''
+        for position in self.positions(k):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.num_added += 1
+
+    def might_contain(self, k):
+        '''
+        Returns false if key k was definitely never added, and true if it probably was. Most missing keys are
+        ruled out by their first bit or two, so the positions are made one at a time
+        '''
+        for position in self.positions(k):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, k):
+        return self.might_contain(k)
+
+    def note_delete(self):
+        '''
+        This method records that a key was deleted from the structure the filter is in front of
+        '''
+        self.num_deleted += 1
+
+    def needs_rebuild(self):
+        '''
+        Returns true if enough keys were deleted, or more keys were added than the filter was sized for, that its
+        false positive rate is worse than it should be
+        '''
+        return self.num_added > self.capacity or self.num_deleted > self.rebuild_ratio * max(self.num_added, 1)
+
+    def rebuild(self, keys):
+        '''
+        This method empties the filter and adds every key in keys, growing it to twice their number if they do not fit
+        '''
+        keys = list(keys)
+        capacity = self.capacity
+        if len(keys) > capacity:
+            capacity = 2 * len(keys)
+        self.allocate(capacity)
+        for k in keys:
+            self.add(k)
+
+    def size_in_bytes(self):
+        '''
+        Returns the memory taken by the filter's bits
+        '''
+        return len(self.bits)
+
+class BlockedBloomFilter(BloomFilter):
+    '''
+    A Bloom filter whose bits for a key all fall in one BLOCK_BITS block. Each block is stored as a Python int,
+    so an add sets all of a key's bits with a single mask
+    '''
+    def allocate(self, capacity):
+        self.capacity = capacity
+        # blocking raises the false positive rate a little, which a few more bits per key make up for
+        num_bits = max(BLOCK_BITS, math.ceil(-capacity * math.log(self.fp_rate) / math.log(2) ** 2 * 1.1))
+        self.num_blocks = math.ceil(num_bits / BLOCK_BITS)
+        self.num_bits = self.num_blocks * BLOCK_BITS
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.blocks = [0] * self.num_blocks
+        self.num_added = 0
+        self.num_deleted = 0
+
+    def block_and_positions(self, k):
+        '''
+        Returns the block of key k and a generator of its bit positions in that block. The top bits of the hash
+        pick the block and 9 bit slices of a second hash pick the bits
+        '''
+        h = self.hash_key(k)
+        return (h >> 32) % self.num_blocks, self.block_positions(h)
+
+    def block_positions(self, h):
+        '''
+        Yields the num_hashes bit positions inside a block for a key with hash h
+        '''
+        bits = (h * FIBONACCI_MULTIPLIER) & MASK64
+        for i in range(self.num_hashes):
+            if i and i % 7 == 0:
+                bits = (bits * FIBONACCI_MULTIPLIER + i) & MASK64
+            yield (bits >> (9 * (i % 7))) & (BLOCK_BITS - 1)
+
+    def add(self, k):
+        block, positions = self.block_and_positions(k)
+        mask = 0
+        for position in positions:
+            mask |= 1 << position
+        self.blocks[block] |= mask
+        self.num_added += 1
+
+    def might_contain(self, k):
+        block, positions = self.block_and_positions(k)
+        bits = self.blocks[block]
+        for position in positions:
+            if not (bits >> position) & 1:
+                return False
+        return True
+
+    def size_in_bytes(self):
+        return self.num_bits // 8
+
+def measure_fp_rate(filter_class, capacity = 100000, fp_rate = .01):
+    '''
+    Returns the false positive rate of a filter holding capacity keys, measured with as many keys that were not added
+    '''
+    bloom_filter = filter_class(capacity, fp_rate, seed = 0)
+    for k in range(capacity):
+        bloom_filter.add(k)
+    return sum(bloom_filter.might_contain(k) for k in range(capacity, 2 * capacity)) / capacity
+
+def compare_miss_lookups(num_keys = 100000, num_searches = 100000, miss_rate = .9):
+    '''
+    Prints how fast HashTable and BTree answer searches that mostly miss, with no filter, a BloomFilter and a
+    BlockedBloomFilter in front of them
+    '''
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Week 3: B Trees'))
+    from b_tree import BTree
+    from hashtable import HashTable
+
+    rng = random.Random(0)
+    keys = rng.sample(range(2**40), num_keys)
+    searches = [rng.randrange(2**40, 2**41) if rng.random() < miss_rate else rng.choice(keys) for i in range(num_searches)]
+
+    structures = {
+        'HashTable': lambda bloom_filter: HashTable(bloom_filter = bloom_filter),
+        'BTree': lambda bloom_filter: BTree(16, bloom_filter = bloom_filter)
+    }
+    filters = {
+        'no filter': lambda: None,
+        'bloom': lambda: BloomFilter(num_keys),
+        'blocked bloom': lambda: BlockedBloomFilter(num_keys)
+    }
+
+    for name, make_structure in structures.items():
+        for filter_name, make_filter in filters.items():
+            structure = make_structure(make_filter())
+            for k in keys:
+                structure.insert(k, k)
+
+            start = time.perf_counter()
+            for k in searches:
+                structure.search(k)
+            seconds = time.perf_counter() - start
+            print('%-10s %-14s %.0f searches/s' % (name, filter_name, num_searches / seconds))
+
+if __name__ == "__main__":
+    for filter_class in [BloomFilter, BlockedBloomFilter]:
+        print('%s: false positive rate %.4f' % (filter_class.__name__, measure_fp_rate(filter_class)))
+    compare_miss_lookups()
@@ -0,0 +1,54 @@
+'''
+This compares filling the hash tables one insert at a time against the bulk load API (from_pairs)
+
+Usage: python bulk_load_benchmark.py [number of pairs]
+'''
+import sys
+import timeit
+from random import random
+
+from hashtable import HashTable
+from open_hash_table import OpenHashTable
+
+def make_pairs(num_pairs):
+    '''
+    Returns num_pairs random integer key value pairs
+    '''
+    return [(int(random() * num_pairs * 10), "value") for n in range(num_pairs)]
+
+def insert_loop_time(table_class, pairs, num_runs = 1):
+    '''
+    Returns the average time to fill a new table from pairs by calling insert for every pair
+    '''
+    CODE = '''
+table = table_class()
+for pair in pairs:
+    table.insert(pair[0], pair[1])
+    '''
+    times = timeit.timeit(stmt = CODE, globals = locals(), number = num_runs)
+    return times/num_runs
+
+def bulk_load_time(table_class, pairs, num_runs = 1):
+    '''
+    Returns the average time to fill a new table from pairs with from_pairs
+    '''
+    CODE = '''
+table = table_class.from_pairs(pairs)
+    '''
+    times = timeit.timeit(stmt = CODE, globals = locals(), number = num_runs)
+    return times/num_runs
+
+def compare(name, table_class, num_pairs):
+    '''
+    Prints the insert loop and bulk load times for one table class
+    '''
+    pairs = make_pairs(num_pairs)
+    loop = insert_loop_time(table_class, pairs)
+    bulk = bulk_load_time(table_class, pairs)
+    print('%s, %d pairs: insert loop %.3fs, from_pairs %.3fs, speedup %.1fx' % (name, num_pairs, loop, bulk, loop / bulk))
+
+if __name__ == "__main__":
+    num_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+
+    compare('closed hashing', HashTable, num_pairs)
+    compare('open hashing', OpenHashTable, num_pairs)
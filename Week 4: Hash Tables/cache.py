@@ -0,0 +1,358 @@
+'''
+This is an implementation of a cache with a bounded number of entries or bytes, built on HashTable. The table maps
+each key to an entry, and an eviction policy picks which entry to drop when the cache is full:
+
+    lru:   least recently used, kept in a doubly linked list threaded through the entries
+    clock: second chance, with one referenced bit per slot and a hand that sweeps the slots
+    lfu:   least frequently used, with the entries grouped in a linked list of frequency lists
+
+Entries can also expire after a time to live. Every operation takes O(1) time
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import sys
+import time
+
+from hashtable import HashTable
+
+class CacheEntry():
+    __slots__ = ('key', 'value', 'size', 'expires', 'prev', 'next', 'frequency', 'slot')
+
+    def __init__(self, key, value, size, expires):
+        self.key = key
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.prev = None
+        self.next = None
+        self.frequency = None
+        self.slot = None
+
+class LinkedList():
+    '''
+    A doubly linked list of entries with a sentinel node, linked through the entries' own prev and next fields
+    '''
+    def __init__(self):
+        self.head = CacheEntry(None, None, 0, None)
+        self.head.prev = self.head
+        self.head.next = self.head
+
+    def is_empty(self):
+        return self.head.next is self.head
+
+    def push_front(self, entry):
+        '''
+        This method links entry in at the front of the list
+        '''
+        entry.prev = self.head
+        entry.next = self.head.next
+        self.head.next.prev = entry
+        self.head.next = entry
+
+    def unlink(self, entry):
+        '''
+        This method takes entry out of the list
+        '''
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+        entry.prev = entry.next = None
+
+    def back(self):
+        '''
+        Returns the entry at the back of the list
+        '''
+        return self.head.prev
+
+class LRUPolicy():
+    '''
+    Evicts the least recently used entry. Used entries move to the front of the list, so the back is the victim
+    '''
+    def __init__(self):
+        self.entries = LinkedList()
+
+    def add(self, entry):
+        self.entries.push_front(entry)
+
+    def touch(self, entry):
+        self.entries.unlink(entry)
+        self.entries.push_front(entry)
+
+    def remove(self, entry):
+        self.entries.unlink(entry)
+
+    def victim(self):
+        return self.entries.back()
+
+class ClockPolicy():
+    '''
+    Evicts the first entry the hand finds with its referenced bit clear, clearing the bits it passes over so each
+    recently used entry gets a second chance. Slots freed by removals are reused by later adds
+    '''
+    def __init__(self):
+        self.slots = []
+        self.referenced = bytearray()
+        self.free_slots = []
+        self.hand = 0
+
+    def add(self, entry):
+        if self.free_slots:
+            entry.slot = self.free_slots.pop()
+            self.slots[entry.slot] = entry
+        else:
+            entry.slot = len(self.slots)
+            self.slots.append(entry)
+            self.referenced.append(0)
+        self.referenced[entry.slot] = 1
+
+    def touch(self, entry):
+        self.referenced[entry.slot] = 1
+
+    def remove(self, entry):
+        self.slots[entry.slot] = None
+        self.referenced[entry.slot] = 0
+        self.free_slots.append(entry.slot)
+
+    def victim(self):
+        while True:
+            if self.hand >= len(self.slots):
+                self.hand = 0
+            entry = self.slots[self.hand]
+            if entry is not None:
+                if not self.referenced[self.hand]:
+                    return entry
+                self.referenced[self.hand] = 0
+            self.hand += 1
+
+class FrequencyNode():
+    __slots__ = ('count', 'entries', 'prev', 'next')
+
+    def __init__(self, count):
+        self.count = count
+        self.entries = LinkedList()
+        self.prev = None
+        self.next = None
+
+class LFUPolicy():
+    '''
+    Evicts the least frequently used entry, and of those the least recently used. The entries used count times are
+    kept in the list of a FrequencyNode, and the nodes are linked in order of count, so a use moves an entry to the
+    next node along and the victim is at the back of the first node
+    '''
+    def __init__(self):
+        self.head = FrequencyNode(0)
+        self.head.prev = self.head
+        self.head.next = self.head
+
+    def insert_node_after(self, node, count):
+        '''
+        Returns a new frequency node for count linked in after node
+        '''
+        new_node = FrequencyNode(count)
+        new_node.prev = node
+        new_node.next = node.next
+        node.next.prev = new_node
+        node.next = new_node
+        return new_node
+
+    def unlink_from_node(self, entry):
+        '''
+        This method takes entry out of its frequency node, dropping the node if it is left empty
+        '''
+        node = entry.frequency
+        node.entries.unlink(entry)
+        if node.entries.is_empty():
+            node.prev.next = node.next
+            node.next.prev = node.prev
+
+    def add(self, entry):
+        node = self.head.next
+        if node is self.head or node.count != 1:
+            node = self.insert_node_after(self.head, 1)
+        entry.frequency = node
+        node.entries.push_front(entry)
+
+    def touch(self, entry):
+        node = entry.frequency
+        next_node = node.next
+        if next_node is self.head or next_node.count != node.count + 1:
+            next_node = self.insert_node_after(node, node.count + 1)
+        self.unlink_from_node(entry)
+        entry.frequency = next_node
+        next_node.entries.push_front(entry)
+
+    def remove(self, entry):
+        self.unlink_from_node(entry)
+        entry.frequency = None
+
+    def victim(self):
+        return self.head.next.entries.back()
+
+EVICTION_POLICIES = {
+    'lru': LRUPolicy,
+    'clock': ClockPolicy,
+    'lfu': LFUPolicy
+}
+
+class Cache():
+    def __init__(self, max_entries = None, max_bytes = None, policy = 'lru', ttl = None, size_of = None, clock = time.monotonic):
+        '''
+        This method initializes an empty cache holding at most max_entries entries and at most max_bytes bytes,
+        where an entry's size is size_of(key) + size_of(value) (sys.getsizeof by default). Entries expire ttl
+        seconds after they are inserted unless insert is given its own ttl, and never if ttl is None
+        '''
+        if policy not in EVICTION_POLICIES:
+            raise ValueError('unknown eviction policy: ' + str(policy))
+
+        self.table = HashTable()
+        self.policy = EVICTION_POLICIES[policy]()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_of = size_of if size_of is not None else sys.getsizeof
+        self.clock = clock
+        self.num_entries = 0
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return self.num_entries
+
+    def search(self, k):
+        '''
+        This method returns the value cached for key k, or None if it is not cached or has expired
+        '''
+        entry = self.table.search(k)
+        if entry is not None and entry.expires is not None and entry.expires <= self.clock():
+            self.remove(entry)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.policy.touch(entry)
+        return entry.value
+
+    def insert(self, k, v, ttl = None):
+        '''
+        This method caches the value v for key k, replacing any value already cached for it, and evicts entries
+        until the cache is back within its limits. Room for a new key is made before it is added, so the policy
+        never picks the entry being inserted as the victim
+        '''
+        if ttl is None:
+            ttl = self.ttl
+        expires = self.clock() + ttl if ttl is not None else None
+        size = self.size_of(k) + self.size_of(v)
+
+        entry = self.table.search(k)
+        if entry is not None:
+            self.num_bytes += size - entry.size
+            entry.value = v
+            entry.size = size
+            entry.expires = expires
+            self.policy.touch(entry)
+        else:
+            while self.num_entries and self.over_limit(1, size):
+                self.evict()
+            entry = CacheEntry(k, v, size, expires)
+            self.table.insert(k, entry)
+            self.policy.add(entry)
+            self.num_entries += 1
+            self.num_bytes += size
+
+        while self.over_limit():
+            self.evict()
+
+    def evict(self):
+        '''
+        This method drops the entry the eviction policy picks
+        '''
+        self.remove(self.policy.victim())
+        self.evictions += 1
+
+    def over_limit(self, extra_entries = 0, extra_bytes = 0):
+        '''
+        Returns true if the cache, with extra_entries more entries of extra_bytes more bytes, would hold more entries
+        or bytes than it is allowed to
+        '''
+        num_entries = self.num_entries + extra_entries
+        if self.max_entries is not None and num_entries > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.num_bytes + extra_bytes > self.max_bytes and num_entries > 0
+
+    def delete(self, k):
+        '''
+        This method removes key k from the cache if it is there
+        '''
+        entry = self.table.search(k)
+        if entry is not None:
+            self.remove(entry)
+
+    def remove(self, entry):
+        '''
+        This method drops an entry from the table and the eviction policy
+        '''
+        self.table.delete(entry.key)
+        self.policy.remove(entry)
+        self.num_entries -= 1
+        self.num_bytes -= entry.size
+
+    def hit_rate(self):
+        '''
+        Returns the share of searches that found a value
+        '''
+        searches = self.hits + self.misses
+        return self.hits / searches if searches else 0
+
+    def stats(self):
+        '''
+        Returns a dictionary of the cache's counters
+        '''
+        return {
+            'entries': self.num_entries,
+            'bytes': self.num_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+def compare_policies(num_keys = 100000, num_ops = 200000, max_entries = 2000, skew = 1.1):
+    '''
+    Prints the hit rate and speed of each eviction policy on a read-through workload whose keys are drawn with
+    Zipf-distributed popularity, with a burst of one-off keys halfway through
+    '''
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) ** skew for rank in range(num_keys)]
+    keys = rng.choices(range(num_keys), weights = weights, k = num_ops)
+    keys[num_ops // 2:num_ops // 2 + max_entries * 2] = range(num_keys, num_keys + max_entries * 2)
+
+    for policy in EVICTION_POLICIES:
+        cache = Cache(max_entries, policy = policy)
+        start = time.perf_counter()
+        for k in keys:
+            if cache.search(k) is None:
+                cache.insert(k, k)
+        seconds = time.perf_counter() - start
+        print('%-6s hit rate %.3f, %d evictions, %.0f ops/s' % (policy, cache.hit_rate(), cache.evictions, num_ops / seconds))
+
+if __name__ == "__main__":
+    # a new key is kept even when every other key has been used more often
+    for policy in EVICTION_POLICIES:
+        cache1 = Cache(2, policy = policy)
+        cache1.insert('a', 1)
+        cache1.insert('b', 2)
+        cache1.search('a')
+        cache1.search('b')
+        cache1.insert('c', 3)
+        assert cache1.search('c') == 3, policy
+        print(policy, cache1.stats())
+
+    compare_policies()
@@ -0,0 +1,258 @@
+'''
+This is an implementation of a Hash Table with search, insert and delete operations laid out like CPython's
+compact dict. The entries are kept in insertion order in dense parallel arrays of hashes, keys and values, and the
+table itself is a sparse index array of small ints pointing into them, stored in the smallest int type that can
+hold an entry number for the table's size. Iterating scans the dense arrays, and growing rebuilds only the index
+array from the stored hashes, leaving the entries where they are
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import sys
+import time
+from array import array
+
+from hash_functions import MASK64, get_hash_function
+from hashtable import HashTable
+from load_factor_policy import LoadFactorPolicy
+
+# index slots hold an entry number, FREE if no entry ever used the slot, or DUMMY if its entry was deleted,
+# which probes step past like a used slot
+FREE = -1
+DUMMY = -2
+
+# keys holds DELETED for entries that were deleted until the next resize drops them
+DELETED = object()
+PERTURB_SHIFT = 5
+
+def index_typecode(size):
+    '''
+    Returns the smallest signed array type that holds every entry number of a table with size slots, and FREE and DUMMY
+    '''
+    for typecode in 'bhiq':
+        if size <= 1 << (8 * array(typecode).itemsize - 1):
+            return typecode
+    raise ValueError('table size too large: ' + str(size))
+
+class CompactHashTable():
+    def __init__(self, size = 8, hash_function = None, seed = None, policy = None):
+        '''
+        This method initializes the hashtable with an index array of size slots, rounded up to a power of two.
+        hash_function and seed pick the hash function through hash_functions.get_hash_function. policy is the LoadFactorPolicy that decides when and how far the index
+        grows and shrinks, by default growing once it is two thirds full like CPython's dict
+        '''
+        self.policy = policy if policy is not None else LoadFactorPolicy(max_load = 2 / 3, min_size = 8)
+        self.hash_function = get_hash_function(hash_function, seed)
+        self.hashes = array('Q')
+        self.keys = []
+        self.values = []
+        self.num_entries = 0
+        self.build_index(1 << max(size - 1, 0).bit_length())
+
+    def build_index(self, size):
+        '''
+        This method replaces the index array with one of the given size and adds every entry to it
+        '''
+        self.indices = array(index_typecode(size), [FREE]) * size
+        self.mask = size - 1
+        for i in range(len(self.keys)):
+            self.indices[self.free_slot(self.hashes[i])] = i
+
+    def probe(self, h):
+        '''
+        Yields the index slots a key with hash h probes, in the same order as CPython: each step multiplies the slot
+        by 5 and adds 1 plus the next bits of the hash, so keys with the same low bits still part ways
+        '''
+        mask = self.mask
+        perturb = h
+        slot = h & mask
+        while True:
+            yield slot
+            perturb >>= PERTURB_SHIFT
+            slot = (slot * 5 + perturb + 1) & mask
+
+    def lookup(self, k, h):
+        '''
+        Returns the index slot and entry number of key k with hash h, or the first free slot on its probe sequence
+        and FREE if it is not in the table
+        '''
+        indices = self.indices
+        for slot in self.probe(h):
+            i = indices[slot]
+            if i == FREE:
+                return slot, FREE
+            if i >= 0 and self.hashes[i] == h and self.keys[i] == k:
+                return slot, i
+
+    def free_slot(self, h):
+        '''
+        Returns the first free index slot on the probe sequence of hash h
+        '''
+        for slot in self.probe(h):
+            if self.indices[slot] == FREE:
+                return slot
+
+    def get_size(self):
+        '''
+        Returns the number of slots in the index array
+        '''
+        return len(self.indices)
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return self.num_entries
+
+    def need_to_resize(self):
+        '''
+        Returns true if one more entry would put the index over the policy's max_load, counting the slots of deleted
+        entries since probes have to step over them
+        '''
+        return self.policy.should_grow(len(self.keys) + 1, self.get_size())
+
+    def resize(self, size = None):
+        '''
+        This method drops the deleted entries and rebuilds the index array at the given size, by default the next
+        size up that the policy grows to, or the same size if dropping the deleted entries makes enough room
+        '''
+        if size is None:
+            size = self.get_size()
+            if self.policy.should_grow(self.num_entries + 1, size):
+                size = self.policy.grown_size(size, True)
+
+        if self.num_entries < len(self.keys):
+            live = [i for i in range(len(self.keys)) if self.keys[i] is not DELETED]
+            self.hashes = array('Q', [self.hashes[i] for i in live])
+            self.keys = [self.keys[i] for i in live]
+            self.values = [self.values[i] for i in live]
+        self.build_index(size)
+
+    def compact(self):
+        '''
+        This method drops the deleted entries and rebuilds the index array at the size the policy picks for the
+        current number of entries
+        '''
+        self.resize(self.policy.fit_size(self.num_entries, self.get_size(), True))
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing
+        value with v. A new key is appended to the entries, so the table keeps insertion order
+        '''
+        h = self.hash_function(k) & MASK64
+        slot, i = self.lookup(k, h)
+        if i != FREE:
+            self.values[i] = v
+            return
+
+        if self.need_to_resize():
+            self.resize()
+            slot = self.free_slot(h)
+
+        self.indices[slot] = len(self.keys)
+        self.hashes.append(h)
+        self.keys.append(k)
+        self.values.append(v)
+        self.num_entries += 1
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key
+        '''
+        h = self.hash_function(k) & MASK64
+        slot, i = self.lookup(k, h)
+        if i == FREE:
+            return None
+        return self.values[i]
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, leaving DUMMY in its index slot and DELETED in its entry until
+        the next resize, and shrinks the table once the policy finds it too empty
+        '''
+        h = self.hash_function(k) & MASK64
+        slot, i = self.lookup(k, h)
+        if i == FREE:
+            return None
+
+        self.indices[slot] = DUMMY
+        self.keys[i] = DELETED
+        self.values[i] = None
+        self.num_entries -= 1
+
+        if self.policy.should_shrink(self.num_entries, self.get_size()):
+            self.resize(self.policy.shrunk_size(self.get_size(), True))
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable in the order they were inserted
+        '''
+        if self.num_entries == len(self.keys):
+            return list(zip(self.keys, self.values))
+        return [(k, v) for k, v in zip(self.keys, self.values) if k is not DELETED]
+
+    def size_in_bytes(self):
+        '''
+        Returns the memory taken by the index array and the entry arrays, not counting the keys and values themselves
+        '''
+        return sys.getsizeof(self.indices) + sys.getsizeof(self.hashes) + sys.getsizeof(self.keys) + sys.getsizeof(self.values)
+
+    def print_table(self):
+        '''
+        This method prints the index array and then the entries
+        '''
+        print(list(self.indices))
+        for elem in self.items():
+            print(elem)
+
+def hashtable_size_in_bytes(table):
+    '''
+    Returns the memory taken by a HashTable's bucket lists and entry tuples, not counting the keys and values themselves
+    '''
+    total = sys.getsizeof(table.table)
+    seen = set()
+    for bucket in table.table:
+        if id(bucket) not in seen:
+            seen.add(id(bucket))
+            total += sys.getsizeof(bucket)
+            total += sum(sys.getsizeof(elem) for elem in bucket)
+    return total
+
+def compare_layouts(num_keys = 100000):
+    '''
+    Prints the bytes per entry and the time to insert every key, iterate over the items and search for every key
+    of HashTable and CompactHashTable
+    '''
+    keys = random.sample(range(2**62), num_keys)
+
+    for name, table, size_in_bytes in [('HashTable', HashTable(), hashtable_size_in_bytes),
+                                       ('CompactHashTable', CompactHashTable(), CompactHashTable.size_in_bytes)]:
+        start = time.perf_counter()
+        for k in keys:
+            table.insert(k, k)
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        table.items()
+        items_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for k in keys:
+            table.search(k)
+        search_seconds = time.perf_counter() - start
+
+        print('%s: %.1f bytes per entry, insert %.2fs, items %.4fs, search %.2fs'
+              % (name, size_in_bytes(table) / num_keys, insert_seconds, items_seconds, search_seconds))
+
+if __name__ == "__main__":
+    table1 = CompactHashTable()
+    for i in range(6):
+        table1.insert('key ' + str(i), i)
+    table1.insert('key 2', 'replaced')
+    table1.delete('key 4')
+    print(table1.search('key 2'))
+    print(table1.search('key 4'))
+    table1.print_table()
+
+    compare_layouts()
@@ -0,0 +1,253 @@
+'''
+This is an implementation of a thread-safe Hash Table with search and insert operations and the ability to grow
+dynamically. Writers lock one stripe of buckets at a time, and readers never take a lock
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import sys
+import threading
+import time
+
+from hashtable import HashTable
+
+class ConcurrentHashTable(HashTable):
+    def __init__(self, size = 16, num_stripes = 16):
+        '''
+        This method initializes the hashtable with num_stripes locks, each guarding an equal range of buckets
+        '''
+        super().__init__(size)
+        self.num_stripes = num_stripes
+        self.locks = [threading.Lock() for i in range(num_stripes)]
+        self.resize_lock = threading.Lock()
+        # number of entries in each stripe's buckets, only changed while holding that stripe's lock
+        self.stripe_counts = [0] * num_stripes
+
+    def get_stripe(self, index, size):
+        '''
+        Returns the stripe guarding bucket index of a table with size buckets
+        '''
+        return index * self.num_stripes // size
+
+    def need_to_resize(self):
+        '''
+        Returns true if the entries per bucket are over the policy's max_load and false otherwise
+        '''
+        return self.policy.should_grow(sum(self.stripe_counts), self.get_size())
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return sum(self.stripe_counts)
+
+    def resize(self, size = None):
+        '''
+        This method moves all of the existing elements into a table of the given size, by default the next size up
+        that the policy grows to if the table still needs it once the locks are held.
+        It holds every stripe lock while it builds the new table, so the old one does not change under it, and
+        readers keep using the old table until the new one replaces it in a single assignment
+        '''
+        with self.resize_lock:
+            for lock in self.locks:
+                lock.acquire()
+            try:
+                if size is None:
+                    if not self.need_to_resize():
+                        return
+                    size = self.policy.grown_size(self.get_size(), self.power_of_two)
+                self.rebuild(size)
+            finally:
+                for lock in self.locks:
+                    lock.release()
+
+    def rebuild(self, size):
+        '''
+        This method builds a new table of the given size from the current one and swaps it in with one assignment.
+        The caller must hold every stripe lock
+        '''
+        table = [[]] * size
+        counts = [0] * self.num_stripes
+        for bucket in self.table:
+            for elem in bucket:
+                index = self.bucket_index(elem[0], size)
+                if table[index]:
+                    table[index].append(elem)
+                else:
+                    table[index] = [elem]
+                counts[self.get_stripe(index, size)] += 1
+
+        for bucket in table:
+            bucket.sort(key = lambda elem: elem[0])
+
+        self.stripe_counts = counts
+        self.table = table
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v at the hashtable index, and if key k already exists in the table, replaces the existing value with v.
+        The bucket is copied, changed and stored back in one assignment, so a reader sees either the old or the new bucket
+        '''
+        while True:
+            table = self.table
+            index = self.bucket_index(k, len(table))
+            stripe = self.get_stripe(index, len(table))
+
+            with self.locks[stripe]:
+                if self.table is not table:
+                    # a resize swapped the table while this thread waited for the lock
+                    continue
+
+                bucket = list(table[index])
+                if bucket:
+                    match, position = self.binary_search(bucket, 0, len(bucket) - 1, k)
+                else:
+                    match, position = False, 0
+
+                if match:
+                    bucket[position] = (k, v)
+                else:
+                    bucket.insert(position, (k, v))
+                    self.stripe_counts[stripe] += 1
+                table[index] = bucket
+            break
+
+        if self.need_to_resize():
+            self.resize()
+
+    def insert_many(self, pairs, size_hint = None):
+        '''
+        This method inserts every key value pair in pairs, with later pairs replacing earlier ones for the same key.
+        It holds every stripe lock, grows the table once to fit the batch, and then replaces each bucket it changes
+        with a new sorted copy, so readers see either the old or the new bucket
+        '''
+        pairs = dict(pairs)
+        if size_hint is None:
+            size_hint = len(pairs)
+
+        with self.resize_lock:
+            for lock in self.locks:
+                lock.acquire()
+            try:
+                size = self.get_size()
+                while self.policy.should_grow(self.get_num_entries() + size_hint, size):
+                    size = self.policy.grown_size(size, self.power_of_two)
+                if size != self.get_size():
+                    self.rebuild(size)
+
+                table = self.table
+                groups = {}
+                for k, v in pairs.items():
+                    groups.setdefault(self.bucket_index(k, size), {})[k] = v
+
+                for index, group in groups.items():
+                    bucket = dict(table[index])
+                    added = len(set(group) - set(bucket))
+                    bucket.update(group)
+                    table[index] = sorted(bucket.items(), key = lambda elem: elem[0])
+                    self.stripe_counts[self.get_stripe(index, size)] += added
+            finally:
+                for lock in self.locks:
+                    lock.release()
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, copying its bucket the same way insert does. The table is not
+        shrunk, so the table readers see is only ever swapped by a resize
+        '''
+        while True:
+            table = self.table
+            index = self.bucket_index(k, len(table))
+            stripe = self.get_stripe(index, len(table))
+
+            with self.locks[stripe]:
+                if self.table is not table:
+                    continue
+
+                bucket = list(table[index])
+                if not bucket:
+                    return None
+                match, position = self.binary_search(bucket, 0, len(bucket) - 1, k)
+                if not match:
+                    return None
+
+                del bucket[position]
+                self.stripe_counts[stripe] -= 1
+                table[index] = bucket
+                return None
+
+    def search(self, k):
+        '''
+        This method searches the array for a given key and returns the value from that key, without taking any lock
+        '''
+        table = self.table
+        return self.search_bucket(table[self.bucket_index(k, len(table))], k)
+
+    def search_many(self, keys):
+        '''
+        This method searches for every key in keys and returns the list of their values, in the same order as keys,
+        without taking any lock. Every key is hashed against the same snapshot of the table, so a resize that swaps
+        the table partway through does not mix up bucket numbers of two sizes
+        '''
+        keys = list(keys)
+        results = [None] * len(keys)
+        table = self.table
+        size = len(table)
+        self.search_grouped(table, lambda k: self.bucket_index(k, size), keys, range(len(keys)), results)
+        return results
+
+class GlobalLockHashTable(HashTable):
+    def __init__(self, size = 16):
+        '''
+        This method initializes a hashtable guarded by a single lock, as a baseline for ConcurrentHashTable
+        '''
+        super().__init__(size)
+        self.lock = threading.Lock()
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v while holding the table's lock
+        '''
+        with self.lock:
+            super().insert(k, v)
+
+    def search(self, k):
+        '''
+        This method searches for key k while holding the table's lock
+        '''
+        with self.lock:
+            return super().search(k)
+
+def threaded_throughput(table, num_readers = 4, num_writers = 1, ops_per_thread = 100000, key_range = 100000):
+    '''
+    Runs num_readers searching threads and num_writers inserting threads against table at the same time and
+    returns the total operations per second
+    '''
+    def reader(seed):
+        rng = random.Random(seed)
+        for i in range(ops_per_thread):
+            table.search(rng.randrange(key_range))
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for i in range(ops_per_thread):
+            table.insert(rng.randrange(key_range), i)
+
+    threads = [threading.Thread(target = reader, args = (seed,)) for seed in range(num_readers)]
+    threads += [threading.Thread(target = writer, args = (num_readers + seed,)) for seed in range(num_writers)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(threads) * ops_per_thread / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    # switch threads often so that the locks are actually contended
+    sys.setswitchinterval(1e-5)
+
+    for num_readers, num_writers in [(1, 1), (4, 1), (8, 1), (4, 4)]:
+        striped = threaded_throughput(ConcurrentHashTable(), num_readers, num_writers)
+        global_lock = threaded_throughput(GlobalLockHashTable(), num_readers, num_writers)
+        print('%d readers, %d writers: striped %.0f ops/s, global lock %.0f ops/s' % (num_readers, num_writers, striped, global_lock))
@@ -0,0 +1,249 @@
+'''
+This is an implementation of a bucketized cuckoo Hash Table with search, insert and delete operations and the ability
+to grow dynamically. Every key lives in one of num_hashes buckets picked by seeded hash functions, or in a small stash,
+so a search looks at no more than num_hashes * bucket_size + stash_size slots. When a key finds no slot and the stash
+is full, the table is rehashed with new hash functions, growing as it goes, and an insert that still does not fit
+raises ValueError and leaves the table as it was
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+
+from hash_functions import MultiplyShiftHash
+
+EMPTY = object()
+
+# a rehash that has not fit every entry after this many tries, doubling the buckets every third one, gives up
+MAX_REHASH_TRIES = 9
+
+class CuckooHashTable():
+    def __init__(self, size = 1, num_hashes = 2, bucket_size = 4, stash_size = 4, max_kicks = 500, max_load = .85):
+        '''
+        This method initializes the table with size buckets of bucket_size slots each. An insert moves at most
+        max_kicks entries before giving up and using the stash, and the table doubles once more than max_load
+        of its slots are used
+        '''
+        self.num_hashes = num_hashes
+        self.bucket_size = bucket_size
+        self.stash_size = stash_size
+        self.max_kicks = max_kicks
+        self.max_load = max_load
+        self.rng = random.Random()
+        self.allocate(max(size, 1))
+
+    def allocate(self, num_buckets):
+        '''
+        This method replaces the table with an empty one of num_buckets buckets and picks fresh hash functions
+        '''
+        self.num_buckets = num_buckets
+        self.keys = [EMPTY] * (num_buckets * self.bucket_size)
+        self.values = [None] * (num_buckets * self.bucket_size)
+        self.stash = []
+        self.count = 0
+        # each hash function is a multiply-shift hash of the key itself with its own random seed, so keys with
+        # equal hash() can still get different buckets
+        self.hash_functions = [MultiplyShiftHash(self.rng.getrandbits(64)) for i in range(self.num_hashes)]
+
+    def hash_key(self, k, i):
+        '''
+        Hashes keys with the i-th hash function, returning a bucket number
+        '''
+        return self.hash_functions[i](k) % self.num_buckets
+
+    def get_buckets(self, k):
+        '''
+        Returns the bucket numbers of key k under every hash function
+        '''
+        return [hash_function(k) % self.num_buckets for hash_function in self.hash_functions]
+
+    def get_size(self):
+        '''
+        Returns the number of slots in the hashtable, not counting the stash
+        '''
+        return len(self.keys)
+
+    def get_num_used_slots(self):
+        '''
+        Returns the number of entries in the hashtable
+        '''
+        return self.count
+
+    def need_to_resize(self):
+        '''
+        Returns true if needed to resize and false otherwise
+        '''
+        return self.count / self.get_size() > self.max_load
+
+    def resize(self):
+        '''
+        This method doubles the number of buckets and rehashes all of the existing elements accordingly
+        '''
+        self.rehash(2 * self.num_buckets)
+
+    def rehash(self, num_buckets, extra = None):
+        '''
+        This method moves all of the existing elements, and the pair extra if given, into a table of num_buckets
+        buckets with fresh hash seeds. If they do not all fit, it tries new seeds, doubling the buckets every third try.
+        After MAX_REHASH_TRIES tries the table is put back as it was and ValueError is raised, since only keys that
+        hash alike under every seed, like unequal keys with the same key_to_bytes, keep colliding that long
+        '''
+        entries = self.items()
+        if extra is not None:
+            entries.append(extra)
+        old_table = (self.num_buckets, self.keys, self.values, self.stash, self.count, self.hash_functions)
+
+        for tries in range(1, MAX_REHASH_TRIES + 1):
+            self.allocate(num_buckets)
+            if all(self.place_or_stash(k, v) for k, v in entries):
+                return
+            if tries % 3 == 0:
+                num_buckets *= 2
+
+        self.num_buckets, self.keys, self.values, self.stash, self.count, self.hash_functions = old_table
+        raise ValueError('could not fit %d entries after %d rehashes, some keys may hash alike under every seed'
+                         % (len(entries), MAX_REHASH_TRIES))
+
+    def find(self, k):
+        '''
+        Returns the slot holding key k, or -1 - i if k is in the stash at position i, or None if k is not in the table
+        '''
+        for bucket in self.get_buckets(k):
+            start = bucket * self.bucket_size
+            for slot in range(start, start + self.bucket_size):
+                if self.keys[slot] is not EMPTY and self.keys[slot] == k:
+                    return slot
+
+        for i in range(len(self.stash)):
+            if self.stash[i][0] == k:
+                return -1 - i
+
+        return None
+
+    def place(self, k, v):
+        '''
+        This method stores a key that is not in the table yet. If all of its buckets are full, it takes a slot in
+        one of them and carries on with the entry it pushed out, up to max_kicks times. Returns None if every entry
+        found a slot, and otherwise undoes its moves and returns the pair k, v
+        '''
+        last_bucket = None
+        kicked_slots = []
+
+        for kick in range(self.max_kicks):
+            buckets = self.get_buckets(k)
+
+            for bucket in buckets:
+                start = bucket * self.bucket_size
+                for slot in range(start, start + self.bucket_size):
+                    if self.keys[slot] is EMPTY:
+                        self.keys[slot] = k
+                        self.values[slot] = v
+                        self.count += 1
+                        return None
+
+            # an entry that was just pushed out should not go straight back into the bucket it left
+            choices = [bucket for bucket in buckets if bucket != last_bucket] or buckets
+            last_bucket = self.rng.choice(choices)
+            slot = last_bucket * self.bucket_size + self.rng.randrange(self.bucket_size)
+            k, self.keys[slot] = self.keys[slot], k
+            v, self.values[slot] = self.values[slot], v
+            kicked_slots.append(slot)
+
+        # swapping back along the path puts every entry where it was and hands back the original pair
+        for slot in reversed(kicked_slots):
+            k, self.keys[slot] = self.keys[slot], k
+            v, self.values[slot] = self.values[slot], v
+        return (k, v)
+
+    def place_or_stash(self, k, v):
+        '''
+        This method places a key that is not in the table yet, using the stash if it finds no slot. Returns false if
+        the stash was full and the key could not be stored
+        '''
+        homeless = self.place(k, v)
+        if homeless is None:
+            return True
+        if len(self.stash) < self.stash_size:
+            self.stash.append(homeless)
+            self.count += 1
+            return True
+        return False
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing value with v.
+        Raises ValueError, leaving the table unchanged, if k cannot be fit in even after rehashing
+        '''
+        slot = self.find(k)
+        if slot is not None:
+            if slot >= 0:
+                self.values[slot] = v
+            else:
+                self.stash[-1 - slot] = (k, v)
+            return
+
+        if self.need_to_resize():
+            self.resize()
+
+        if not self.place_or_stash(k, v):
+            # the eviction walk went around in a cycle and the stash is full, so start over with new hash functions
+            self.rehash(self.num_buckets, (k, v))
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key
+        '''
+        for bucket in self.get_buckets(k):
+            start = bucket * self.bucket_size
+            for slot in range(start, start + self.bucket_size):
+                if self.keys[slot] is not EMPTY and self.keys[slot] == k:
+                    return self.values[slot]
+
+        for key, value in self.stash:
+            if key == k:
+                return value
+
+        return None
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists
+        '''
+        slot = self.find(k)
+        if slot is None:
+            return None
+
+        if slot >= 0:
+            self.keys[slot] = EMPTY
+            self.values[slot] = None
+        else:
+            self.stash.pop(-1 - slot)
+        self.count -= 1
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable
+        '''
+        pairs = [(k, self.values[slot]) for slot, k in enumerate(self.keys) if k is not EMPTY]
+        return pairs + list(self.stash)
+
+    def print_table(self):
+        '''
+        This method prints the hash table, one bucket per line, followed by the stash
+        '''
+        for bucket in range(self.num_buckets):
+            start = bucket * self.bucket_size
+            print([(self.keys[slot], self.values[slot]) for slot in range(start, start + self.bucket_size)
+                   if self.keys[slot] is not EMPTY])
+        print('stash:', self.stash)
+
+if __name__ == "__main__":
+    table1 = CuckooHashTable(4)
+    for i in range(40):
+        table1.insert(i, 'value ' + str(i))
+    table1.insert(12, 'replaced')
+    print(table1.search(12))
+    print(table1.search(39))
+    print(table1.search(40))
+    table1.delete(39)
+    print(table1.search(39))
+    table1.print_table()
@@ -0,0 +1,257 @@
+'''
+This is an implementation of an extendible Hash Table with search, insert and delete operations. A directory of
+2^global_depth pointers is indexed by the low global_depth bits of a key's hash, and several directory entries can
+point to the same bucket. Buckets hold at most bucket_size entries and each has a local depth, the number of hash
+bits all of its keys share. A full bucket splits on its own, moving only its own entries, and the directory doubles
+only when the splitting bucket already uses every bit the directory looks at, which copies pointers but no entries.
+Buckets are not split past max_depth bits, so the directory stays within 2^max_depth pointers. Past about
+bucket_size * 2^max_depth entries the buckets fill up and take more than bucket_size entries, searched one by one,
+which stats() reports as overflow_entries
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import time
+
+from hash_functions import get_hash_function
+from hashtable import HashTable
+
+# buckets are not split past this depth, so the directory never holds more than 2^MAX_DEPTH pointers (8MB of them)
+# and a bucket whose keys agree in this many hash bits just overflows, which with the default bucket_size of 16
+# starts at around 16M entries
+MAX_DEPTH = 20
+
+class Bucket():
+    def __init__(self, local_depth):
+        '''
+        This method initializes an empty bucket whose keys all share their low local_depth hash bits
+        '''
+        self.local_depth = local_depth
+        self.entries = []
+
+    def find(self, k):
+        '''
+        Returns the position of key k in the bucket, or None if it is not there
+        '''
+        for i in range(len(self.entries)):
+            if self.entries[i][0] == k:
+                return i
+        return None
+
+class ExtendibleHashTable():
+    def __init__(self, bucket_size = 16, hash_function = 'multiply shift', seed = None, max_depth = MAX_DEPTH):
+        '''
+        This method initializes the hashtable with a single empty bucket of bucket_size slots. hash_function and
+        seed go to hash_functions.get_hash_function, and hash_function defaults to multiply-shift, since the directory is indexed by the low bits of the hash
+        and Python hashes ints to themselves, so keys like i << 20 would share 20 low bits and double the directory
+        once per bit. Buckets are not split past max_depth bits, so a table expected to hold more than about
+        bucket_size * 2^max_depth entries needs a larger max_depth or bucket_size to keep its buckets from overflowing
+        '''
+        self.bucket_size = bucket_size
+        self.max_depth = max_depth
+        self.hash_function = get_hash_function(hash_function, seed)
+        self.global_depth = 0
+        self.directory = [Bucket(0)]
+        self.num_buckets = 1
+        self.num_entries = 0
+        # number of buckets with each local depth, so the directory knows when it can halve
+        self.depth_counts = [1] + [0] * max_depth
+
+    def hash_key(self, k):
+        '''
+        Returns the directory index of key k
+        '''
+        return self.hash_function(k) & ((1 << self.global_depth) - 1)
+
+    def get_bucket(self, k):
+        '''
+        Returns the bucket that holds key k if it is in the table
+        '''
+        return self.directory[self.hash_key(k)]
+
+    def get_size(self):
+        '''
+        Returns the number of slots in the hashtable's buckets
+        '''
+        return self.num_buckets * self.bucket_size
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return self.num_entries
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing value with v
+        '''
+        bucket = self.get_bucket(k)
+        position = bucket.find(k)
+        if position is not None:
+            bucket.entries[position] = (k, v)
+            return
+
+        while len(bucket.entries) >= self.bucket_size and bucket.local_depth < self.max_depth and self.can_split(bucket, k):
+            self.split(bucket)
+            bucket = self.get_bucket(k)
+
+        bucket.entries.append((k, v))
+        self.num_entries += 1
+
+    def can_split(self, bucket, k):
+        '''
+        Returns false if key k and every key in bucket have the same hash, since no number of splits would ever
+        separate them, and true otherwise
+        '''
+        h = self.hash_function(k)
+        for elem in bucket.entries:
+            if self.hash_function(elem[0]) != h:
+                return True
+        return False
+
+    def split(self, bucket):
+        '''
+        This method splits a full bucket in two on the next hash bit, doubling the directory first if the bucket
+        already uses every bit the directory looks at
+        '''
+        if bucket.local_depth == self.global_depth:
+            self.directory = self.directory + self.directory
+            self.global_depth += 1
+
+        bit = 1 << bucket.local_depth
+        entries = bucket.entries
+        # the hash bits every key in the bucket shares, which are also the low bits of its directory indices
+        shared_bits = self.hash_function(entries[0][0]) & (bit - 1)
+
+        self.depth_counts[bucket.local_depth] -= 1
+        bucket.local_depth += 1
+        self.depth_counts[bucket.local_depth] += 2
+        new_bucket = Bucket(bucket.local_depth)
+        self.num_buckets += 1
+
+        bucket.entries = []
+        for elem in entries:
+            if self.hash_function(elem[0]) & bit:
+                new_bucket.entries.append(elem)
+            else:
+                bucket.entries.append(elem)
+
+        # every directory entry for the old bucket whose index has the new bit set now points to the new bucket
+        for index in range(shared_bits | bit, len(self.directory), bit << 1):
+            self.directory[index] = new_bucket
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key
+        '''
+        bucket = self.get_bucket(k)
+        for elem in bucket.entries:
+            if elem[0] == k:
+                return elem[1]
+        return None
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, merging its bucket with its split partner when the two fit in
+        one bucket, and halving the directory once no bucket needs all of its bits
+        '''
+        index = self.hash_key(k)
+        bucket = self.directory[index]
+        position = bucket.find(k)
+        if position is None:
+            return None
+
+        bucket.entries.pop(position)
+        self.num_entries -= 1
+
+        while bucket.local_depth > 0:
+            bit = 1 << (bucket.local_depth - 1)
+            partner = self.directory[index ^ bit]
+            if partner.local_depth != bucket.local_depth or len(bucket.entries) + len(partner.entries) > self.bucket_size:
+                break
+
+            # the merged bucket keeps the one without the bit set, at the lower directory indices
+            low, high = (bucket, partner) if not index & bit else (partner, bucket)
+            low.entries += high.entries
+            self.depth_counts[low.local_depth] -= 2
+            low.local_depth -= 1
+            self.depth_counts[low.local_depth] += 1
+            self.num_buckets -= 1
+            for i in range(index & (bit - 1), len(self.directory), bit):
+                self.directory[i] = low
+            bucket = low
+            index &= bit - 1
+
+        while self.global_depth > 0 and self.depth_counts[self.global_depth] == 0:
+            self.global_depth -= 1
+            self.directory = self.directory[:1 << self.global_depth]
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable
+        '''
+        pairs = []
+        for index, bucket in enumerate(self.directory):
+            # each bucket is listed once, at the lowest directory index that points to it
+            if index < (1 << bucket.local_depth):
+                pairs += bucket.entries
+        return pairs
+
+    def stats(self):
+        '''
+        Returns a dictionary describing the directory and buckets. overflow_entries counts the entries past
+        bucket_size in buckets that could not split, because they reached max_depth or their keys have equal hashes
+        '''
+        buckets = [bucket for index, bucket in enumerate(self.directory) if index < (1 << bucket.local_depth)]
+        return {
+            'entries': self.num_entries,
+            'buckets': self.num_buckets,
+            'global_depth': self.global_depth,
+            'max_depth': self.max_depth,
+            'max_bucket_length': max(len(bucket.entries) for bucket in buckets),
+            'overflow_entries': sum(max(0, len(bucket.entries) - self.bucket_size) for bucket in buckets)
+        }
+
+    def print_table(self):
+        '''
+        This method prints the directory, one entry per line with the local depth and entries of its bucket
+        '''
+        for index, bucket in enumerate(self.directory):
+            print(format(index, '0%db' % self.global_depth) if self.global_depth else '-', bucket.local_depth, bucket.entries)
+
+def compare_insert_latency(num_keys = 10**6):
+    '''
+    Prints the mean and worst single insert time of HashTable, which rehashes everything when it doubles, and
+    ExtendibleHashTable, which only ever splits one bucket
+    '''
+    keys = random.sample(range(2**62), num_keys)
+
+    for name, table in [('HashTable', HashTable()), ('ExtendibleHashTable', ExtendibleHashTable())]:
+        worst = 0
+        start = time.perf_counter()
+        for k in keys:
+            insert_start = time.perf_counter()
+            table.insert(k, k)
+            worst = max(worst, time.perf_counter() - insert_start)
+        total = time.perf_counter() - start
+        print('%s: mean %.2fus, worst %.2fms' % (name, total / num_keys * 1e6, worst * 1000))
+
+if __name__ == "__main__":
+    table1 = ExtendibleHashTable(bucket_size = 2)
+    for i in range(10):
+        table1.insert(i, 'value ' + str(i))
+    table1.insert(3, 'replaced')
+    print(table1.search(3))
+    print(table1.search(10))
+    table1.print_table()
+    for i in range(8):
+        table1.delete(i)
+    table1.print_table()
+
+    # with max_depth 2 the 4 buckets of 2 slots are full after about 8 keys and the rest overflow
+    table2 = ExtendibleHashTable(bucket_size = 2, max_depth = 2)
+    for i in range(20):
+        table2.insert(i, i)
+    print(table2.stats())
+
+    compare_insert_latency()
@@ -0,0 +1,164 @@
+'''
+These are hash function families the hash tables can use in place of Python's hash(). Python hashes an int to
+itself, so keys like sequential ids or multiples of a power of two land in runs of neighbouring slots or all in the
+same few slots. Each family picks its random parameters from a seed, and equal ints, floats, strs, bytes and tuples
+of them get equal hashes. Every function returns a 64 bit hash
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import hashlib
+import random
+import struct
+
+MASK64 = (1 << 64) - 1
+# 2^64 divided by the golden ratio, made odd, for Fibonacci (multiplicative) hashing: the top bits of the product
+# of a key and this constant depend on every bit of the key
+FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+def key_to_bytes(k):
+    '''
+    Returns the bytes a key is hashed from: a byte for the kind of key followed by, for ints (and floats equal to an
+    int, as 1.0 == 1), their signed little endian bytes, for other floats their 8 byte IEEE encoding, for strs their
+    UTF-8 encoding, for bytes the bytes themselves, for tuples the length and bytes of each element in turn, and for
+    any other key its Python hash. Keys that are not equal, like 'a' and b'a' or (-1,) and (-2,), only get the same
+    bytes if they are of some other type and have equal Python hashes
+    '''
+    if isinstance(k, float):
+        if not k.is_integer():
+            return b'f' + struct.pack('<d', k)
+        k = int(k)
+    if isinstance(k, int):
+        return b'i' + k.to_bytes(max(8, (k.bit_length() + 8) // 8), 'little', signed = True)
+    if isinstance(k, str):
+        return b's' + k.encode('utf-8', 'surrogatepass')
+    if isinstance(k, (bytes, bytearray)):
+        return b'b' + bytes(k)
+    if isinstance(k, tuple):
+        parts = [b't']
+        for elem in k:
+            elem_bytes = key_to_bytes(elem)
+            parts.append(len(elem_bytes).to_bytes(4, 'little'))
+            parts.append(elem_bytes)
+        return b''.join(parts)
+    return b'h' + (hash(k) & MASK64).to_bytes(8, 'little')
+
+def builtin_hash(k):
+    '''
+    Returns Python's own hash of k
+    '''
+    return hash(k)
+
+class MultiplyShiftHash():
+    '''
+    Multiply-shift hashing: a 64 bit key x hashes to the top 64 bits of a * x + b mod 2^128 for a random odd a
+    and random b. Longer keys are cut into 32 bit chunks that are each multiplied by their own random number and
+    summed (vector multiply-shift)
+    '''
+    def __init__(self, seed = None):
+        self.rng = random.Random(seed)
+        self.a = self.rng.getrandbits(128) | 1
+        self.b = self.rng.getrandbits(128)
+        self.chunk_multipliers = []
+
+    def __call__(self, k):
+        if isinstance(k, float) and k.is_integer():
+            k = int(k)
+        if isinstance(k, int) and -2**63 <= k < 2**63:
+            return (((k & MASK64) * self.a + self.b) & ((1 << 128) - 1)) >> 64
+
+        data = key_to_bytes(k)
+        num_chunks = (len(data) + 3) // 4
+        while len(self.chunk_multipliers) < num_chunks:
+            self.chunk_multipliers.append(self.rng.getrandbits(128))
+
+        total = self.b + len(data) * self.a
+        for i in range(num_chunks):
+            total += self.chunk_multipliers[i] * int.from_bytes(data[4 * i:4 * i + 4], 'little')
+        return (total & ((1 << 128) - 1)) >> 64
+
+class TabulationHash():
+    '''
+    Simple tabulation hashing: each of the 8 bytes of a 64 bit key looks up a random 64 bit number in its own
+    table and the 8 numbers are XORed together. Keys that are not 64 bit ints are first reduced to 64 bits with
+    a multiply-shift hash
+    '''
+    def __init__(self, seed = None):
+        rng = random.Random(seed)
+        self.tables = [[rng.getrandbits(64) for i in range(256)] for byte in range(8)]
+        self.reduce = MultiplyShiftHash(rng.getrandbits(64))
+
+    def __call__(self, k):
+        if isinstance(k, float) and k.is_integer():
+            k = int(k)
+        if isinstance(k, int) and -2**63 <= k < 2**63:
+            x = k & MASK64
+        else:
+            x = self.reduce(k)
+
+        h = 0
+        for table in self.tables:
+            h ^= table[x & 0xFF]
+            x >>= 8
+        return h
+
+class SeededHash():
+    '''
+    Seeded hashing: the key's bytes are hashed with BLAKE2b keyed by the seed, so without the seed an adversary
+    cannot pick keys that collide
+    '''
+    def __init__(self, seed = None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.key = seed.to_bytes(16, 'little')
+
+    def __call__(self, k):
+        return int.from_bytes(hashlib.blake2b(key_to_bytes(k), digest_size = 8, key = self.key).digest(), 'little')
+
+# maps each family name to a function that takes a seed and returns a hash function
+HASH_FUNCTIONS = {
+    'builtin': lambda seed = None: builtin_hash,
+    'multiply shift': MultiplyShiftHash,
+    'tabulation': TabulationHash,
+    'seeded': SeededHash
+}
+
+def get_hash_function(hash_function = None, seed = None):
+    '''
+    Returns the hash function for hash_function, which is None for Python's hash(), the name of a family in
+    HASH_FUNCTIONS seeded with seed, or a function from keys to ints that is returned as is. The tables' hash_function
+    and seed parameters are passed straight here
+    '''
+    if hash_function is None:
+        return builtin_hash
+    if callable(hash_function):
+        return hash_function
+    if hash_function not in HASH_FUNCTIONS:
+        raise ValueError('unknown hash function: ' + str(hash_function))
+    return HASH_FUNCTIONS[hash_function](seed)
+
+def compare_probe_lengths(num_keys = 5000, table_size = 2**13):
+    '''
+    Prints the mean and max probe lengths of a linear probing table with each hash function, for sequential keys,
+    keys with a stride of 64, and keys that are all multiples of 2^32. Misses are searches for the next num_keys
+    keys of the same pattern, which are not in the table
+    '''
+    from open_hash_table import OpenHashTable
+
+    key_sets = {
+        'sequential': [i for i in range(num_keys)],
+        'strided': [64 * i for i in range(num_keys)],
+        'adversarial': [i << 32 for i in range(num_keys)]
+    }
+
+    for key_set, keys in key_sets.items():
+        missing = [k + keys[-1] + keys[1] for k in keys]
+        for name in HASH_FUNCTIONS:
+            table = OpenHashTable(table_size, probe = 'linear', hash_function = name, seed = 1, power_of_two = True)
+            table.insert_many([(k, k) for k in keys])
+            hits = table.get_probe_distances()
+            misses = [table.probe_distance(k) for k in missing]
+            print('%-12s %-15s hit mean %6.2f max %5d | miss mean %8.2f max %5d' % (
+                key_set, name, sum(hits) / len(hits), max(hits), sum(misses) / len(misses), max(misses)))
+
+if __name__ == "__main__":
+    compare_probe_lengths()
@@ -0,0 +1,77 @@
+'''
+This is a statistics collector that the hash tables fill in when they are created with stats = True, recording
+probe lengths, resizes, load factor over time and key comparisons
+'''
+import json
+
+class TableStats():
+    def __init__(self, sample_every = 1000):
+        '''
+        This method initializes empty counters. The load factor is sampled every sample_every operations and at every resize
+        '''
+        self.sample_every = sample_every
+        self.num_ops = 0
+        self.insert_probe_lengths = {}
+        self.search_probe_lengths = {}
+        self.resizes = []
+        self.load_factors = []
+        self.comparisons = 0
+
+    def record_op(self, table):
+        '''
+        This method counts one insert or search on table and samples its load factor every sample_every operations
+        '''
+        self.num_ops += 1
+        if self.num_ops % self.sample_every == 0:
+            self.sample_load_factor(table)
+
+    def sample_load_factor(self, table):
+        '''
+        This method records the current load factor of table, its entries per slot as the LoadFactorPolicy measures
+        it, against the number of operations so far
+        '''
+        self.load_factors.append((self.num_ops, table.get_num_entries() / table.get_size()))
+
+    def record_insert_probe(self, length):
+        '''
+        This method adds an insert that took length probe steps to the histogram
+        '''
+        self.insert_probe_lengths[length] = self.insert_probe_lengths.get(length, 0) + 1
+
+    def record_search_probe(self, length):
+        '''
+        This method adds a search that took length probe steps to the histogram
+        '''
+        self.search_probe_lengths[length] = self.search_probe_lengths.get(length, 0) + 1
+
+    def record_resize(self, table, old_size, seconds):
+        '''
+        This method records that table was rebuilt from old_size slots to its current size, taking seconds
+        '''
+        self.resizes.append({'from': old_size, 'to': table.get_size(), 'seconds': seconds})
+        self.sample_load_factor(table)
+
+    def to_dict(self):
+        '''
+        Returns the collected statistics as a dictionary of plain values
+        '''
+        return {
+            'operations': self.num_ops,
+            'insert_probe_lengths': dict(sorted(self.insert_probe_lengths.items())),
+            'search_probe_lengths': dict(sorted(self.search_probe_lengths.items())),
+            'resize_count': len(self.resizes),
+            'resize_seconds': sum(resize['seconds'] for resize in self.resizes),
+            'resizes': list(self.resizes),
+            'load_factors': list(self.load_factors),
+            'comparisons': self.comparisons
+        }
+
+def dump_stats(stats, file):
+    '''
+    Writes a stats dictionary to file, which is either a path or an open text file, as JSON
+    '''
+    if isinstance(file, str):
+        with open(file, 'w') as f:
+            json.dump(stats, f, indent = 2)
+    else:
+        json.dump(stats, file, indent = 2)
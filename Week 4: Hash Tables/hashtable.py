@@ -3,16 +3,243 @@ This is an implementation of a Hash Table with search and insert operations and
 
 More Information: https://rpucella.net/other/is-dsa-sp22/
 '''
+import time
+
+from hash_functions import get_hash_function
+from hash_stats import TableStats, dump_stats
+from load_factor_policy import LoadFactorPolicy
+from perfect_hash import FrozenHashTable
+
+# buckets holding more entries than this are converted from sorted lists to balanced trees, and trees
+# that deletes bring down to UNTREEIFY_THRESHOLD entries are turned back into lists
+TREEIFY_THRESHOLD = 8
+UNTREEIFY_THRESHOLD = 4
+
+class TreeNode():
+    __slots__ = ('key', 'value', 'left', 'right', 'height')
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.left = None
+        self.right = None
+        self.height = 1
+
+def node_height(node):
+    '''
+    Returns the height of a subtree, with 0 for an empty one
+    '''
+    return node.height if node is not None else 0
+
+class BucketTree():
+    '''
+    An AVL tree holding the entries of one long bucket, so inserts and searches in it take O(log b) time
+    '''
+    def __init__(self, pairs = ()):
+        '''
+        This method builds a balanced tree from a list of key value pairs sorted by key
+        '''
+        self.root = self.build(pairs, 0, len(pairs) - 1)
+        self.count = len(pairs)
+
+    def build(self, pairs, start, end):
+        '''
+        Returns the root of a perfectly balanced subtree holding pairs[start:end + 1]
+        '''
+        if start > end:
+            return None
+        mid = (start + end) // 2
+        node = TreeNode(pairs[mid][0], pairs[mid][1])
+        node.left = self.build(pairs, start, mid - 1)
+        node.right = self.build(pairs, mid + 1, end)
+        node.height = 1 + max(node_height(node.left), node_height(node.right))
+        return node
+
+    def rotate_left(self, node):
+        '''
+        Returns the new root of the subtree after rotating node down to the left
+        '''
+        top = node.right
+        node.right = top.left
+        top.left = node
+        node.height = 1 + max(node_height(node.left), node_height(node.right))
+        top.height = 1 + max(node_height(top.left), node_height(top.right))
+        return top
+
+    def rotate_right(self, node):
+        '''
+        Returns the new root of the subtree after rotating node down to the right
+        '''
+        top = node.left
+        node.left = top.right
+        top.right = node
+        node.height = 1 + max(node_height(node.left), node_height(node.right))
+        top.height = 1 + max(node_height(top.left), node_height(top.right))
+        return top
+
+    def rebalance(self, node):
+        '''
+        Returns the root of the subtree after fixing node's height and rotating it if its sides differ in height by two
+        '''
+        node.height = 1 + max(node_height(node.left), node_height(node.right))
+        balance = node_height(node.left) - node_height(node.right)
+
+        if balance > 1:
+            if node_height(node.left.left) < node_height(node.left.right):
+                node.left = self.rotate_left(node.left)
+            return self.rotate_right(node)
+        if balance < -1:
+            if node_height(node.right.right) < node_height(node.right.left):
+                node.right = self.rotate_right(node.right)
+            return self.rotate_left(node)
+        return node
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, replacing the value if k is already in the tree.
+        Returns true if k is a new key
+        '''
+        path = []
+        node = self.root
+        while node is not None:
+            if k < node.key:
+                path.append((node, 'left'))
+                node = node.left
+            elif k > node.key:
+                path.append((node, 'right'))
+                node = node.right
+            else:
+                node.value = v
+                return False
+
+        child = TreeNode(k, v)
+        self.count += 1
+        # walk back up the path, rebalancing each ancestor and hooking the result back into its parent
+        for parent, side in reversed(path):
+            setattr(parent, side, child)
+            child = self.rebalance(parent)
+        self.root = child
+        return True
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists. Returns true if it was in the tree
+        '''
+        path = []
+        node = self.root
+        while node is not None and k != node.key:
+            side = 'left' if k < node.key else 'right'
+            path.append((node, side))
+            node = getattr(node, side)
+        if node is None:
+            return False
+
+        if node.left is not None and node.right is not None:
+            # swap in the smallest key of the right subtree, then remove the node that held it instead
+            path.append((node, 'right'))
+            successor = node.right
+            while successor.left is not None:
+                path.append((successor, 'left'))
+                successor = successor.left
+            node.key, node.value = successor.key, successor.value
+            node = successor
+
+        child = node.left if node.left is not None else node.right
+        self.count -= 1
+        for parent, side in reversed(path):
+            setattr(parent, side, child)
+            child = self.rebalance(parent)
+        self.root = child
+        return True
+
+    def search(self, k):
+        '''
+        This method searches the tree for a given key and returns the value from that key
+        '''
+        node = self.root
+        while node is not None:
+            if k < node.key:
+                node = node.left
+            elif k > node.key:
+                node = node.right
+            else:
+                return node.value
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        '''
+        Yields the key value pairs in key order
+        '''
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.key, node.value)
+            node = node.right
+
+    def __repr__(self):
+        return 'BucketTree(%r)' % list(self)
 
 class HashTable():
-    def __init__(self, size = 1):
+    def __init__(self, size = 1, incremental = False, migrate_batch = 4, stats = False, treeify_threshold = TREEIFY_THRESHOLD,
+                 hash_function = None, seed = None, power_of_two = False, policy = None, bloom_filter = None):
+        '''
+        This method initializes the hashtable. If incremental is true, a resize moves entries into the new table
+        a few buckets at a time (migrate_batch buckets per insert or search) instead of all at once.
+        If stats is true, the table records statistics that stats() returns. Buckets that grow past
+        treeify_threshold entries are turned into balanced trees. hash_function and seed are handed to
+        hash_functions.get_hash_function. If power_of_two is true, the size is rounded up to a power of two. policy
+        is the LoadFactorPolicy that decides when and how far the table grows and shrinks. bloom_filter is an optional empty filter from bloom_filter.py that
+        searches check first, so most searches for missing keys return without hashing into the table
+        '''
+        if power_of_two:
+            size = 1 << max(size - 1, 0).bit_length()
         self.table = [[]]*size
+        self.power_of_two = power_of_two
+        self.policy = policy if policy is not None else LoadFactorPolicy()
+        self.num_entries = 0
+        self.bloom_filter = bloom_filter
+        self.hash_function = get_hash_function(hash_function, seed)
+        self.treeify_threshold = treeify_threshold
+        self.stats_collector = TableStats() if stats else None
+        self.num_used_slots = 0
+        self.incremental = incremental
+        self.migrate_batch = migrate_batch
+        self.old_table = None
+        self.migrate_index = 0
         
     def hash_key(self, k):
         '''
         Hashes keys
         '''
-        return hash(k) % len(self.table)
+        return self.bucket_index(k, len(self.table))
+
+    def old_hash_key(self, k):
+        '''
+        Hashes keys into the old table while a migration is in progress
+        '''
+        return self.bucket_index(k, len(self.old_table))
+
+    def bucket_index(self, k, size):
+        '''
+        Returns the bucket of key k in a table with size buckets, masking instead of taking the modulo when size is a power of two
+        '''
+        h = self.hash_function(k)
+        if size & (size - 1) == 0:
+            return h & (size - 1)
+        return h % size
+
+    def is_migrating(self):
+        '''
+        Returns true if entries are still being moved from the old table to the new one
+        '''
+        return self.old_table is not None
 
     def get_size(self):
         '''
@@ -24,103 +251,428 @@ class HashTable():
         '''
         Returns the number of slots/indices in the hashtable that are used
         '''
-        return len(list(filter(lambda elem: len(elem) > 0, self.table)))
+        return self.num_used_slots
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return self.num_entries
 
     def need_to_resize(self):
         '''
-        Returns true if needed to resize and false otherwise
+        Returns true if the entries per bucket are over the policy's max_load and false otherwise
         '''
-        size = self.get_size()
-        slots_used = self.get_num_used_slots()
+        return self.policy.should_grow(self.get_num_entries(), self.get_size())
 
-        if slots_used / size > .75:
-            return True
+    def resize(self, size = None):
+        '''
+        This method moves all of the existing elements into a table of the given size, by default the next size up
+        that the policy grows to
+        '''
+        if size is None:
+            size = self.policy.grown_size(self.get_size(), self.power_of_two)
+
+        if self.stats_collector is not None:
+            old_size = self.get_size()
+            start = time.perf_counter()
+
+        if self.incremental:
+            self.start_migration(size)
         else:
-            return False
+            old_table = [num for sublist in self.table for num in sublist]
+            self.table = [[]] * size
+            self.num_used_slots = 0
 
-    def resize(self):
+            for elem in old_table:
+                self.place(elem[0], elem[1])
+
+        if self.stats_collector is not None:
+            self.stats_collector.record_resize(self, old_size, time.perf_counter() - start)
+
+    def compact(self):
         '''
-        This method doubles the old size of the array and rehashes all of the existing elements accordingly
+        This method resizes the table to the size the policy picks for the current number of entries, giving back
+        the memory of a table that deletes have left mostly empty
         '''
-        old_table = [num for sublist in self.table for num in sublist]
-        self.table = [[]] * (2 * self.get_size())
+        if self.is_migrating():
+            self.finish_migration()
 
-        for elem in old_table:
-            self.insert(elem[0], elem[1])
-        
+        size = self.policy.fit_size(self.get_num_entries(), self.get_size(), self.power_of_two)
+        if size != self.get_size():
+            self.resize(size)
+            self.finish_migration()
+
+    def start_migration(self, size):
+        '''
+        This method replaces the array with an empty one of the given size and keeps the old one around so its buckets can be moved over gradually
+        '''
+        if self.is_migrating():
+            self.finish_migration()
+
+        self.old_table = self.table
+        self.migrate_index = 0
+        self.table = [[]] * size
+        self.num_used_slots = 0
+
+    def migrate_bucket(self, index):
+        '''
+        This method moves every entry of one bucket of the old table into the new table
+        '''
+        bucket = self.old_table[index]
+        if not bucket:
+            return
+
+        self.old_table[index] = []
+        for elem in bucket:
+            self.place(elem[0], elem[1])
+
+    def migrate_step(self):
+        '''
+        This method moves the next migrate_batch buckets of the old table into the new table, dropping the old table once it is empty
+        '''
+        end = min(self.migrate_index + self.migrate_batch, len(self.old_table))
+
+        for index in range(self.migrate_index, end):
+            self.migrate_bucket(index)
+
+        self.migrate_index = end
+        if self.migrate_index == len(self.old_table):
+            self.old_table = None
+
+    def finish_migration(self):
+        '''
+        This method moves all remaining buckets of the old table into the new table
+        '''
+        while self.is_migrating():
+            self.migrate_step()
 
     def insert(self, k, v):
         '''
         This method inserts the key value pair k, v at the hashtable index, and if key k already exists in the table, replaces the existing value with v
         '''
+        if self.stats_collector is not None:
+            self.stats_collector.record_op(self)
+
         if self.need_to_resize():
             self.resize()
 
+        if self.is_migrating():
+            # the key's old bucket is moved first so an older value can't be left behind in the old table
+            self.migrate_bucket(self.old_hash_key(k))
+            self.migrate_step()
+
+        if self.place(k, v):
+            self.num_entries += 1
+            if self.bloom_filter is not None:
+                self.bloom_filter.add(k)
+                if self.bloom_filter.needs_rebuild():
+                    self.bloom_filter.rebuild(k for k, v in self.items())
+
+    def place(self, k, v):
+        '''
+        This method puts the key value pair k, v in its bucket of the current table without checking whether to resize.
+        Returns true if k was not in the bucket already
+        '''
         hashed_key = self.hash_key(k)       
-        content_length = len(self.table[hashed_key])
+        bucket = self.table[hashed_key]
+        content_length = len(bucket)
         
         if content_length == 0:
             self.table[hashed_key] = [(k,v)]
+            self.num_used_slots += 1
+            return True
+
+        elif isinstance(bucket, BucketTree):
+            return bucket.insert(k, v)
         
         else:
         
-            match, index = self.binary_search(self.table[hashed_key], 0, (content_length - 1), k)
+            match, index = self.binary_search(bucket, 0, (content_length - 1), k)
 
             if match:
-                self.table[hashed_key][index] = (k,v)
+                bucket[index] = (k,v)
+                return False
             else:
-                self.table[hashed_key].insert(index, (k,v))
-        
+                bucket.insert(index, (k,v))
+                if content_length + 1 > self.treeify_threshold:
+                    self.table[hashed_key] = BucketTree(bucket)
+                return True
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, and shrinks the table once the policy finds it too empty
+        '''
+        if self.is_migrating():
+            self.migrate_bucket(self.old_hash_key(k))
+            self.migrate_step()
+
+        hashed_key = self.hash_key(k)
+        bucket = self.table[hashed_key]
+        if len(bucket) == 0:
+            return None
+
+        if isinstance(bucket, BucketTree):
+            if not bucket.delete(k):
+                return None
+            if len(bucket) <= UNTREEIFY_THRESHOLD:
+                self.table[hashed_key] = list(bucket)
+        else:
+            match, index = self.binary_search(bucket, 0, len(bucket) - 1, k)
+            if not match:
+                return None
+            del bucket[index]
+            if len(bucket) == 0:
+                self.num_used_slots -= 1
+
+        self.num_entries -= 1
+        if self.bloom_filter is not None:
+            self.bloom_filter.note_delete()
+            if self.bloom_filter.needs_rebuild():
+                self.bloom_filter.rebuild(k for k, v in self.items())
+        if self.policy.should_shrink(self.get_num_entries(), self.get_size()):
+            self.resize(self.policy.shrunk_size(self.get_size(), self.power_of_two))
            
+    @classmethod
+    def from_pairs(cls, pairs, size_hint = None, **kwargs):
+        '''
+        This method builds a new hashtable from an iterable of key value pairs, sizing the table once up front
+        '''
+        table = cls(**kwargs)
+        table.insert_many(pairs, size_hint)
+        return table
+
+    def insert_many(self, pairs, size_hint = None):
+        '''
+        This method inserts every key value pair in pairs, with later pairs replacing earlier ones for the same key.
+        The table is grown once to fit the whole batch (size_hint can stand in for len(pairs)) and the pairs are
+        grouped by bucket, so each bucket is sorted once instead of going through insert for every pair
+        '''
+        if size_hint is None:
+            pairs = list(pairs)
+            size_hint = len(pairs)
+
+        if self.is_migrating():
+            self.finish_migration()
+
+        size = self.get_size()
+        while self.policy.should_grow(self.get_num_entries() + size_hint, size):
+            size = self.policy.grown_size(size, self.power_of_two)
+
+        groups = {}
+        if size != self.get_size():
+            if self.stats_collector is not None:
+                old_size = self.get_size()
+                start = time.perf_counter()
+
+            existing = [elem for bucket in self.table for elem in bucket]
+            self.table = [[]] * size
+            self.num_used_slots = 0
+            self.num_entries = 0
+            for k, v in existing:
+                groups.setdefault(self.hash_key(k), {})[k] = v
+
+            if self.stats_collector is not None:
+                self.stats_collector.record_resize(self, old_size, time.perf_counter() - start)
+
+        for k, v in pairs:
+            hashed_key = self.hash_key(k)
+            group = groups.get(hashed_key)
+            if group is None:
+                # entries already in the bucket go in first so the new pairs overwrite them
+                group = groups[hashed_key] = dict(self.table[hashed_key])
+            if self.bloom_filter is not None and k not in group:
+                # only keys new to the table count toward the filter's capacity
+                self.bloom_filter.add(k)
+            group[k] = v
+
+        for hashed_key, group in groups.items():
+            if len(self.table[hashed_key]) == 0:
+                self.num_used_slots += 1
+            self.num_entries += len(group) - len(self.table[hashed_key])
+            bucket = sorted(group.items(), key = lambda elem: elem[0])
+            if len(bucket) > self.treeify_threshold:
+                bucket = BucketTree(bucket)
+            self.table[hashed_key] = bucket
+
+        if self.bloom_filter is not None and self.bloom_filter.needs_rebuild():
+            self.bloom_filter.rebuild(k for k, v in self.items())
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable
+        '''
+        pairs = [elem for bucket in self.table for elem in bucket]
+        if self.is_migrating():
+            pairs += [elem for bucket in self.old_table for elem in bucket]
+        return pairs
+
+    def freeze(self):
+        '''
+        Returns a FrozenHashTable of the current key value pairs, which can only be searched, with one slot looked at per search
+        '''
+        return FrozenHashTable(self.items())
+
     def binary_search(self, content, start, end, key):
         '''
-        This method contains a standard binary search
+        This method contains a standard binary search, returning whether key was found and either its index or the
+        index where it would be inserted
         '''
-       
-        if start == end:
-          
-            if content[start][0] > key:
-                return False, start
-            elif content[start][0] == key:
-                return True, start
+        while start <= end:
+            if self.stats_collector is not None:
+                self.stats_collector.comparisons += 1
+
+            mid = (start + end) // 2
+
+            if content[mid][0] < key:
+                start = mid + 1
+            elif content[mid][0] > key:
+                end = mid - 1
             else:
-                return False, start + 1
-            
-        
-        if start > end:
-            return False, start
-        
-        mid = (start + end) // 2
-        
-        if content[mid][0] < key:
-            return self.binary_search(content, mid + 1, end, key)
-        elif content[mid][0] > key:
-            return self.binary_search(content, start, mid - 1, key)
-        else:
-            return True, mid
+                return True, mid
+
+        return False, start
 
     def search(self, k):
         '''
         This method searches the array for a given key and returns the value from that key
         '''
+        if self.stats_collector is not None:
+            self.stats_collector.record_op(self)
 
-        hashed_key = self.hash_key(k)
-        if len(self.table[hashed_key]) == 0:
+        if self.bloom_filter is not None and not self.bloom_filter.might_contain(k):
             return None
-        print(type(self.table[hashed_key]))
-        print(type(len(self.table[hashed_key]) - 1))
-        match, index = self.binary_search(self.table[hashed_key], 0, len(self.table[hashed_key]) - 1, k)
+
+        if self.is_migrating():
+            value = self.search_bucket(self.old_table[self.old_hash_key(k)], k)
+            self.migrate_step()
+            if value is not None:
+                return value
+
+        return self.search_bucket(self.table[self.hash_key(k)], k)
+
+    def search_bucket(self, bucket, k):
+        '''
+        This method searches a single bucket for a given key and returns the value from that key
+        '''
+        if len(bucket) == 0:
+            return None
+        if isinstance(bucket, BucketTree):
+            return bucket.search(k)
+        match, index = self.binary_search(bucket, 0, len(bucket) - 1, k)
 
         if match:
-            return self.table[hashed_key][index][1]
+            return bucket[index][1]
         else:
             return None
 
+    def search_many(self, keys):
+        '''
+        This method searches for every key in keys and returns the list of their values, in the same order as keys.
+        Each key is hashed once and the keys are grouped by bucket, so every bucket is scanned once for all of its keys
+        '''
+        keys = list(keys)
+        results = [None] * len(keys)
+
+        if self.stats_collector is not None:
+            for k in keys:
+                self.stats_collector.record_op(self)
+
+        positions = range(len(keys))
+        if self.bloom_filter is not None:
+            positions = [position for position in positions if self.bloom_filter.might_contain(keys[position])]
+        if self.is_migrating():
+            positions = self.search_grouped(self.old_table, self.old_hash_key, keys, positions, results)
+            self.migrate_step()
+
+        self.search_grouped(self.table, self.hash_key, keys, positions, results)
+        return results
+
+    def search_grouped(self, table, hash_key, keys, positions, results):
+        '''
+        This method looks up the keys at the given positions of keys in table, storing each value found at the same
+        position of results. Each bucket's keys are sorted and walked alongside the sorted bucket in one merge pass.
+        Returns the positions whose keys were not found
+        '''
+        groups = {}
+        for position in positions:
+            index = hash_key(keys[position])
+            group = groups.get(index)
+            if group is None:
+                groups[index] = position
+            elif type(group) is list:
+                group.append(position)
+            else:
+                groups[index] = [group, position]
+
+        missing = []
+        for index, group in groups.items():
+            bucket = table[index]
+
+            if type(group) is not list:
+                # a bucket with a single key to look up needs no merge
+                value = self.search_bucket(bucket, keys[group])
+                if value is None:
+                    missing.append(group)
+                results[group] = value
+                continue
+
+            if isinstance(bucket, BucketTree):
+                for position in group:
+                    value = bucket.search(keys[position])
+                    if value is None:
+                        missing.append(position)
+                    results[position] = value
+                continue
+
+            group.sort(key = lambda position: keys[position])
+            i = 0
+            for position in group:
+                k = keys[position]
+                while i < len(bucket) and bucket[i][0] < k:
+                    i += 1
+                if i < len(bucket) and bucket[i][0] == k:
+                    results[position] = bucket[i][1]
+                else:
+                    missing.append(position)
+
+        return missing
+
         
+    def stats(self):
+        '''
+        Returns a dictionary of the statistics recorded so far along with a histogram of the current bucket lengths,
+        or None if the table was not created with stats = True
+        '''
+        if self.stats_collector is None:
+            return None
+
+        bucket_lengths = {}
+        for bucket in self.table:
+            bucket_lengths[len(bucket)] = bucket_lengths.get(len(bucket), 0) + 1
+
+        result = self.stats_collector.to_dict()
+        result['size'] = self.get_size()
+        result['used_slots'] = self.get_num_used_slots()
+        result['entries'] = self.get_num_entries()
+        result['bucket_lengths'] = dict(sorted(bucket_lengths.items()))
+        return result
+
+    def dump_stats(self, file):
+        '''
+        Writes the result of stats() to file, which is either a path or an open text file, as JSON
+        '''
+        dump_stats(self.stats(), file)
+
     def print_table(self):
         '''
         This method prints the hash table
         '''
+        if self.is_migrating():
+            print('old table:')
+            for item in self.old_table:
+                print(item)
+            print('new table:')
         for item in self.table:
             print(item)
 
@@ -0,0 +1,215 @@
+'''
+This is an implementation of an open Hash Table for 64-bit integer keys, stored in NumPy arrays, with batch search and
+insert operations that hash and linearly probe a whole array of keys at a time
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import numpy as np
+
+from hash_functions import FIBONACCI_MULTIPLIER, MASK64
+
+class IntHashTable():
+    def __init__(self, size = 8):
+        '''
+        This method initializes the table with keys, values and occupancy arrays, rounding size up to a power of two
+        '''
+        capacity = 2
+        while capacity < size:
+            capacity *= 2
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        '''
+        This method replaces the arrays with empty ones of the given power of two capacity
+        '''
+        self.keys = np.zeros(capacity, dtype = np.int64)
+        self.values = np.empty(capacity, dtype = object)
+        self.used = np.zeros(capacity, dtype = bool)
+        self.shift = 64 - (capacity.bit_length() - 1)
+        self.count = 0
+
+    def get_size(self):
+        '''
+        Returns the size of the hashtable
+        '''
+        return len(self.keys)
+
+    def get_num_used_slots(self):
+        '''
+        Returns the number of slots/indices in the hashtable that are used
+        '''
+        return self.count
+
+    def hash_key(self, k):
+        '''
+        Hashes a single key by taking the top bits of k times the Fibonacci multiplier. k can be a Python int or a
+        numpy integer such as an element of the keys array
+        '''
+        k = int(k)
+        return (((k & MASK64) * FIBONACCI_MULTIPLIER) & MASK64) >> self.shift
+
+    def hash_keys(self, keys):
+        '''
+        Hashes an int64 array of keys the same way as hash_key, relying on uint64 multiplication wrapping around
+        '''
+        hashed = keys.view(np.uint64) * np.uint64(FIBONACCI_MULTIPLIER)
+        return (hashed >> np.uint64(self.shift)).astype(np.intp)
+
+    def need_to_resize(self, num_new):
+        '''
+        Returns true if adding num_new keys would put the table over a .75 load factor and false otherwise
+        '''
+        return (self.count + num_new) / self.get_size() > .75
+
+    def resize(self, num_new):
+        '''
+        This method doubles the size of the arrays until num_new more keys fit, and rehashes the existing keys as one batch
+        '''
+        capacity = self.get_size()
+        while (self.count + num_new) / capacity > .75:
+            capacity *= 2
+
+        old_keys = self.keys[self.used]
+        old_values = self.values[self.used]
+        self.allocate(capacity)
+        self.place_many(old_keys, old_values)
+
+    def find_slots(self, keys):
+        '''
+        This method probes for every key in the array at once and returns the slot holding each key, or -1 if it is missing.
+        Each round advances every key that is still sitting on an occupied slot holding a different key
+        '''
+        mask = self.get_size() - 1
+        slots = self.hash_keys(keys)
+        result = np.full(len(keys), -1, dtype = np.intp)
+        pending = np.arange(len(keys))
+
+        while pending.size:
+            current = slots[pending]
+            occupied = self.used[current]
+            match = occupied & (self.keys[current] == keys[pending])
+            result[pending[match]] = current[match]
+
+            # keys that reached an empty slot are missing, and keys that matched are done
+            pending = pending[occupied & ~match]
+            slots[pending] = (slots[pending] + 1) & mask
+
+        return result
+
+    def place_many(self, keys, values):
+        '''
+        This method stores an array of distinct keys and their values without checking whether to resize.
+        When several keys reach the same empty slot in a round, the first one takes it and the rest keep probing
+        '''
+        mask = self.get_size() - 1
+        slots = self.hash_keys(keys)
+        pending = np.arange(len(keys))
+
+        while pending.size:
+            current = slots[pending]
+            occupied = self.used[current]
+            match = occupied & (self.keys[current] == keys[pending])
+            self.values[current[match]] = values[pending[match]]
+            placed = match
+
+            empty = np.nonzero(~occupied)[0]
+            if empty.size:
+                unique_slots, first = np.unique(current[empty], return_index = True)
+                winners = empty[first]
+                self.used[unique_slots] = True
+                self.keys[unique_slots] = keys[pending[winners]]
+                self.values[unique_slots] = values[pending[winners]]
+                self.count += winners.size
+                placed[winners] = True
+
+            # keys that lost an empty slot to another key see it occupied next round and move on then
+            advance = pending[occupied & ~match]
+            slots[advance] = (slots[advance] + 1) & mask
+            pending = pending[~placed]
+
+    def insert_many(self, keys, values):
+        '''
+        This method inserts every key in the array keys with the matching entry of values, and if a key already exists
+        in the table, replaces the existing value. If a key appears more than once, its last value wins
+        '''
+        keys = np.asarray(keys, dtype = np.int64)
+        if not isinstance(values, np.ndarray) or values.dtype != object:
+            values = np.fromiter(values, dtype = object, count = len(keys))
+
+        # np.unique on the reversed keys finds the last occurrence of each key
+        unique_keys, last = np.unique(keys[::-1], return_index = True)
+        last = len(keys) - 1 - last
+        values = values[last]
+
+        if self.need_to_resize(len(unique_keys)):
+            self.resize(len(unique_keys))
+
+        self.place_many(unique_keys, values)
+
+    def search_many(self, keys, default = None):
+        '''
+        This method searches the table for every key in the array keys and returns an array of their values,
+        with default in place of keys that are not in the table
+        '''
+        keys = np.asarray(keys, dtype = np.int64)
+        slots = self.find_slots(keys)
+        found = slots >= 0
+
+        result = np.full(len(keys), default, dtype = object)
+        result[found] = self.values[slots[found]]
+        return result
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing value with v
+        '''
+        if self.need_to_resize(1):
+            self.resize(1)
+
+        k = int(k)
+        mask = self.get_size() - 1
+        hashed_key = self.hash_key(k)
+        while self.used[hashed_key] and self.keys[hashed_key] != k:
+            hashed_key = (hashed_key + 1) & mask
+
+        if not self.used[hashed_key]:
+            self.used[hashed_key] = True
+            self.keys[hashed_key] = k
+            self.count += 1
+        self.values[hashed_key] = v
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key
+        '''
+        k = int(k)
+        mask = self.get_size() - 1
+        hashed_key = self.hash_key(k)
+        while self.used[hashed_key]:
+            if self.keys[hashed_key] == k:
+                return self.values[hashed_key]
+            hashed_key = (hashed_key + 1) & mask
+
+        return None
+
+    def print_table(self):
+        '''
+        This method prints the hash table
+        '''
+        for i in range(self.get_size()):
+            if self.used[i]:
+                print([(int(self.keys[i]), self.values[i])])
+            else:
+                print([])
+
+if __name__ == "__main__":
+    import timeit
+
+    num_keys = 10**6
+    keys = np.random.randint(-2**63, 2**63 - 1, size = num_keys, dtype = np.int64)
+    values = np.arange(num_keys).astype(object)
+
+    table = IntHashTable()
+    print('insert_many: %.3fs' % timeit.timeit(lambda: table.insert_many(keys, values), number = 1))
+    print('search_many: %.3fs' % timeit.timeit(lambda: table.search_many(keys), number = 1))
+    print('search loop: %.3fs' % timeit.timeit(lambda: [table.search(k) for k in keys], number = 1))
@@ -0,0 +1,67 @@
+'''
+This is the policy the hash tables use to decide when to grow or shrink and to what size. The load factor is the
+number of entries per slot (or per bucket for chained tables). A table grows by growth_factor once the load factor
+passes max_load and shrinks by growth_factor once it falls below min_load. The gap between the two thresholds is
+the hysteresis that keeps a table from growing and shrinking back and forth as entries come and go at a boundary
+'''
+
+class LoadFactorPolicy():
+    def __init__(self, max_load = .75, min_load = .2, growth_factor = 2, min_size = 1):
+        '''
+        This method checks that the thresholds leave room for hysteresis: a table that just grew must not be
+        below min_load, and a table that just shrank must not be above max_load. A min_load of 0 turns shrinking off
+        '''
+        if growth_factor <= 1:
+            raise ValueError('growth_factor must be greater than 1')
+        if min_load * growth_factor >= max_load:
+            raise ValueError('min_load times growth_factor must be less than max_load')
+
+        self.max_load = max_load
+        self.min_load = min_load
+        self.growth_factor = growth_factor
+        self.min_size = min_size
+
+    def should_grow(self, num_entries, size):
+        '''
+        Returns true if a table of size slots holding num_entries entries is over max_load
+        '''
+        return num_entries / size > self.max_load
+
+    def should_shrink(self, num_entries, size):
+        '''
+        Returns true if a table of size slots holding num_entries entries is under min_load and can still shrink
+        '''
+        return size > self.min_size and num_entries / size < self.min_load
+
+    def grown_size(self, size, power_of_two = False):
+        '''
+        Returns the size a table of size slots grows to
+        '''
+        new_size = max(int(size * self.growth_factor), size + 1)
+        if power_of_two:
+            new_size = 1 << (new_size - 1).bit_length()
+        return new_size
+
+    def shrunk_size(self, size, power_of_two = False):
+        '''
+        Returns the size a table of size slots shrinks to, never below min_size
+        '''
+        new_size = max(int(size / self.growth_factor), self.min_size, 1)
+        if power_of_two:
+            # rounding down keeps the table smaller than it was, and rounding min_size back up keeps it above the minimum
+            new_size = max(1 << (new_size.bit_length() - 1), 1 << (self.min_size - 1).bit_length() if self.min_size > 1 else 1)
+        return new_size
+
+    def fit_size(self, num_entries, size, power_of_two = False):
+        '''
+        Returns the size, reached from size by growing or shrinking, at which num_entries entries sit between
+        min_load and max_load
+        '''
+        while self.should_grow(num_entries, size):
+            size = self.grown_size(size, power_of_two)
+        while self.should_shrink(num_entries, size):
+            new_size = self.shrunk_size(size, power_of_two)
+            if new_size >= size or self.should_grow(num_entries, new_size):
+                break
+            size = new_size
+        return size
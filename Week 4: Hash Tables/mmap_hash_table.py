@@ -0,0 +1,313 @@
+'''
+This is an implementation of an open Hash Table stored in a file and used in place through mmap, with search, insert
+and delete operations and the ability to grow. Opening a table only maps the file and reads its header, so it takes
+the same time whatever the table's size, and processes that open the same file share its pages in the OS page cache
+
+File layout, all integers little endian:
+    header (HEADER_SIZE bytes): magic, version, key kind, key size, value size, capacity, count, used slots, append offset
+    capacity fixed size slot records: state byte, key (key size bytes), value field
+    append region: variable length values, referenced from slots by (offset, length)
+
+Integer keys are stored as 8 byte signed integers and byte keys must be exactly key_size bytes long. With a value_size,
+values are fixed width byte strings stored in the slot; without one, each value is appended to the end of the file
+and the slot stores its offset and length. Slots are found by linear probing from a hash of the key's bytes that
+does not change between processes
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import hashlib
+import io
+import mmap
+import os
+import struct
+
+MAGIC = b'OHTMMAP1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIQQQQ')
+HEADER_SIZE = 64
+VALUE_REF = struct.Struct('<QQ')
+INT_KEY = struct.Struct('<q')
+
+KEY_KINDS = {'int': 0, 'bytes': 1}
+
+SLOT_EMPTY = 0
+SLOT_USED = 1
+SLOT_DELETED = 2
+
+class MmapHashTable():
+    def __init__(self, path, readonly = False, max_load = .75):
+        '''
+        This method opens the table stored at path, which create() made. A read-only table can be opened
+        by many processes at once
+        '''
+        self.path = path
+        self.readonly = readonly
+        self.max_load = max_load
+        self.open_map()
+
+    @classmethod
+    def create(cls, path, capacity = 1024, key_type = 'int', key_size = 8, value_size = None, max_load = .75):
+        '''
+        This method writes an empty table with capacity slots to path and opens it. key_type is 'int' or 'bytes',
+        and value_size is the width of fixed size values, or None to store values in the append region
+        '''
+        if key_type == 'int':
+            key_size = INT_KEY.size
+
+        record_size = 1 + key_size + (value_size if value_size is not None else VALUE_REF.size)
+        append_offset = HEADER_SIZE + capacity * record_size
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, KEY_KINDS[key_type], key_size, value_size or 0,
+                                capacity, 0, 0, append_offset).ljust(HEADER_SIZE, b'\0'))
+            f.truncate(append_offset)
+
+        return cls(path, max_load = max_load)
+
+    @classmethod
+    def from_pairs(cls, path, pairs, key_type = 'int', key_size = 8, value_size = None, max_load = .75):
+        '''
+        This method writes a table holding the key value pairs in pairs to path, sized once for all of them, and opens it.
+        The values must be bytes-like, so pairs from another table need their values encoded first
+        '''
+        pairs = list(pairs)
+        capacity = 1
+        while len(pairs) / capacity > max_load:
+            capacity *= 2
+
+        table = cls.create(path, capacity, key_type, key_size, value_size, max_load)
+        for k, v in pairs:
+            table.insert(k, v)
+        return table
+
+    def open_map(self):
+        '''
+        This method maps the file and reads its header
+        '''
+        with open(self.path, 'rb' if self.readonly else 'r+b') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE)
+
+        magic, version, key_kind, self.key_size, value_size, self.capacity, self.count, self.used, self.append_offset = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError('%s is not a mmap hash table file' % self.path)
+
+        self.int_keys = key_kind == KEY_KINDS['int']
+        self.value_size = value_size or None
+        self.record_size = 1 + self.key_size + (self.value_size if self.value_size is not None else VALUE_REF.size)
+
+    def check_writable(self):
+        '''
+        This method raises io.UnsupportedOperation if the table was opened read-only, before a change touches the file
+        '''
+        if self.readonly:
+            raise io.UnsupportedOperation('table is open read-only: ' + self.path)
+
+    def write_header(self):
+        '''
+        This method writes the counts and the append offset back to the header
+        '''
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, 0 if self.int_keys else 1, self.key_size, self.value_size or 0,
+                         self.capacity, self.count, self.used, self.append_offset)
+
+    def encode_key(self, k):
+        '''
+        Returns the bytes stored for key k
+        '''
+        if self.int_keys:
+            return INT_KEY.pack(k)
+        if len(k) != self.key_size:
+            raise ValueError('keys must be %d bytes long' % self.key_size)
+        return bytes(k)
+
+    def hash_key(self, key_bytes):
+        '''
+        Hashes the bytes of a key into a slot number
+        '''
+        return int.from_bytes(hashlib.blake2b(key_bytes, digest_size = 8).digest(), 'little') % self.capacity
+
+    def get_size(self):
+        '''
+        Returns the size of the hashtable
+        '''
+        return self.capacity
+
+    def get_num_used_slots(self):
+        '''
+        Returns the number of slots that hold an entry or a tombstone
+        '''
+        return self.used
+
+    def slot_offset(self, slot):
+        '''
+        Returns the file offset of a slot's record
+        '''
+        return HEADER_SIZE + slot * self.record_size
+
+    def probe(self, key_bytes):
+        '''
+        This method walks the slots from the key's home slot and returns the slot holding the key, or else the first
+        tombstone passed or the empty slot that ended the walk
+        '''
+        slot = self.hash_key(key_bytes)
+        first_deleted = None
+
+        for i in range(self.capacity):
+            offset = self.slot_offset(slot)
+            state = self.map[offset]
+            if state == SLOT_EMPTY:
+                break
+            if state == SLOT_USED and self.map[offset + 1:offset + 1 + self.key_size] == key_bytes:
+                return slot
+            if state == SLOT_DELETED and first_deleted is None:
+                first_deleted = slot
+            slot = (slot + 1) % self.capacity
+
+        if first_deleted is not None:
+            return first_deleted
+        return slot
+
+    def read_value(self, offset):
+        '''
+        Returns the value stored in the record at offset
+        '''
+        value_offset = offset + 1 + self.key_size
+        if self.value_size is not None:
+            return self.map[value_offset:value_offset + self.value_size]
+
+        start, length = VALUE_REF.unpack_from(self.map, value_offset)
+        return self.map[start:start + length]
+
+    def write_value(self, offset, v):
+        '''
+        This method stores v in the record at offset, appending it to the end of the file if values are not fixed size
+        '''
+        value_offset = offset + 1 + self.key_size
+        if self.value_size is not None:
+            self.map[value_offset:value_offset + self.value_size] = v
+            return
+
+        end = self.append_offset + len(v)
+        if end > len(self.map):
+            self.map.resize(max(end, 2 * len(self.map)))
+        self.map[self.append_offset:end] = v
+        VALUE_REF.pack_into(self.map, value_offset, self.append_offset, len(v))
+        self.append_offset = end
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key as bytes
+        '''
+        key_bytes = self.encode_key(k)
+        offset = self.slot_offset(self.probe(key_bytes))
+
+        if self.map[offset] == SLOT_USED and self.map[offset + 1:offset + 1 + self.key_size] == key_bytes:
+            return self.read_value(offset)
+        return None
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing value with v.
+        v must be bytes-like, since the table stores raw bytes and bytes() of an int would be that many zero bytes.
+        The key and value are checked before anything is written, so a rejected pair leaves the table unchanged
+        '''
+        self.check_writable()
+        if not isinstance(v, (bytes, bytearray, memoryview)):
+            raise TypeError('values must be bytes-like, not %s' % type(v).__name__)
+        v = bytes(v)
+        if self.value_size is not None and len(v) != self.value_size:
+            raise ValueError('values must be %d bytes long' % self.value_size)
+        key_bytes = self.encode_key(k)
+
+        if (self.used + 1) / self.capacity > self.max_load:
+            self.resize()
+        offset = self.slot_offset(self.probe(key_bytes))
+        state = self.map[offset]
+
+        if state != SLOT_USED:
+            self.count += 1
+            if state == SLOT_EMPTY:
+                self.used += 1
+            self.map[offset] = SLOT_USED
+            self.map[offset + 1:offset + 1 + self.key_size] = key_bytes
+
+        self.write_value(offset, v)
+        self.write_header()
+
+    def delete(self, k):
+        '''
+        This method deletes the key k if it exists, leaving a tombstone in its slot
+        '''
+        self.check_writable()
+        key_bytes = self.encode_key(k)
+        offset = self.slot_offset(self.probe(key_bytes))
+
+        if self.map[offset] == SLOT_USED and self.map[offset + 1:offset + 1 + self.key_size] == key_bytes:
+            self.map[offset] = SLOT_DELETED
+            self.count -= 1
+            self.write_header()
+
+    def items(self):
+        '''
+        Yields every key value pair in the table, with keys decoded back to ints for integer key tables
+        '''
+        for slot in range(self.capacity):
+            offset = self.slot_offset(slot)
+            if self.map[offset] == SLOT_USED:
+                key_bytes = self.map[offset + 1:offset + 1 + self.key_size]
+                k = INT_KEY.unpack(key_bytes)[0] if self.int_keys else key_bytes
+                yield k, self.read_value(offset)
+
+    def resize(self):
+        '''
+        This method rewrites the table into a new file with double the slots, dropping tombstones and unused bytes
+        in the append region, and swaps it in for the old file. Processes that still have the old file open keep
+        seeing the old table
+        '''
+        self.check_writable()
+        temp_path = self.path + '.resize'
+        new_table = MmapHashTable.create(temp_path, 2 * self.capacity, 'int' if self.int_keys else 'bytes',
+                                         self.key_size, self.value_size, self.max_load)
+        for k, v in self.items():
+            new_table.insert(k, v)
+        new_table.close()
+
+        self.map.close()
+        os.replace(temp_path, self.path)
+        self.open_map()
+
+    def flush(self):
+        '''
+        This method writes changed pages back to the file
+        '''
+        if not self.readonly:
+            self.map.flush()
+
+    def close(self):
+        '''
+        This method flushes and unmaps the file
+        '''
+        self.flush()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    path = os.path.join(tempfile.mkdtemp(), 'table.bin')
+    num_keys = 10**5
+    with MmapHashTable.from_pairs(path, ((i, b'value %d' % i) for i in range(num_keys))) as table:
+        print('built %d entries, %d slots' % (table.count, table.get_size()))
+
+    start = time.perf_counter()
+    table = MmapHashTable(path, readonly = True)
+    print('open: %.3fms' % ((time.perf_counter() - start) * 1000))
+    print(table.search(42), table.search(num_keys))
+    table.close()
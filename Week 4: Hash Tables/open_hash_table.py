@@ -3,116 +3,383 @@ This is an implementation of an open Hash Table with search and insert operation
 
 More Information: https://rpucella.net/other/is-dsa-sp22/
 '''  
-from cProfile import label
-import timeit
-import matplotlib.pyplot as plt
+import time
+from random import random
+
+from hash_functions import FIBONACCI_MULTIPLIER, MASK64, get_hash_function
+from hash_stats import TableStats, dump_stats
+from load_factor_policy import LoadFactorPolicy
+from perfect_hash import FrozenHashTable
+
+# keys holds EMPTY in unused slots and DELETED in slots whose entry was deleted (tombstones),
+# which probes step past like a used slot but which no key compares equal to
+EMPTY = object()
+DELETED = object()
+
+# swiss probing keeps one control byte per slot: CTRL_EMPTY, CTRL_DELETED, or 7 bits of the key's hash if the slot is used,
+# and looks at GROUP_SIZE slots at a time
+CTRL_EMPTY = 0x80
+CTRL_DELETED = 0xFE
+GROUP_SIZE = 16
+SWISS_GROUP_BITS = (1 << 57) - 1
+
+def linear_step(slot, i, h, size):
+    '''
+    Returns the next slot of a linear probe
+    '''
+    return (slot + 1) % size
+
+def quadratic_step(slot, i, h, size):
+    '''
+    Returns the next slot of a quadratic probe
+    '''
+    return (slot + i*i) % size
+
+def double_hashing_step(slot, i, h, size):
+    '''
+    Returns the next slot of a double hashing probe, stepping by an odd secondary hash of the key
+    '''
+    return (slot + i * ((((h // size) % max(size // 2, 1)) * 2) + 1)) % size
+
+def triangular_step(slot, i, h, size):
+    '''
+    Returns the next slot of a quadratic probe on the triangular numbers, which visits every slot of a power of two table
+    '''
+    return (slot + i) % size
+
+# maps each probe name to its step function and whether it needs a power of two table size. A step function
+# takes the current slot, the number of steps taken so far (counting this one), the key's full hash and the
+# table size, and returns the next slot to look at
+PROBE_SEQUENCES = {}
+
+def register_probe(name, step, power_of_two = False):
+    '''
+    Registers a probe sequence that OpenHashTable can use with probe = name
+    '''
+    PROBE_SEQUENCES[name] = (step, power_of_two)
+
+register_probe('linear', linear_step)
+register_probe('quadratic', quadratic_step)
+register_probe('double hashing', double_hashing_step)
+register_probe('triangular', triangular_step, power_of_two = True)
 
 class OpenHashTable():
-    def __init__(self, size = 1, probe = 'linear'):
-        self.table = [[]]*size
+    def __init__(self, size = 1, probe = 'linear', tombstone_threshold = .25, stats = False, hash_function = None, seed = None,
+                 power_of_two = False, policy = None):
+        '''
+        This method initializes the hashtable. Once tombstones fill more than tombstone_threshold of the slots,
+        the table is compacted. The probe sequence is looked up once here, and robin hood probing is linear
+        probing with its own insert and delete. If stats is true, the table records statistics that stats() returns.
+        hash_function and seed are as in hash_functions.get_hash_function. If power_of_two is true, the size is rounded up to a power of two.
+        policy is the LoadFactorPolicy that decides when and how far the table grows and shrinks
+        '''
         self.probe = probe
+        self.policy = policy if policy is not None else LoadFactorPolicy()
+        self.hash_function = get_hash_function(hash_function, seed)
+        self.stats_collector = TableStats() if stats else None
+        self.tombstone_threshold = tombstone_threshold
+
+        if probe == 'robin hood':
+            self.probe_function = self.robin_hood_probe
+            self.probe_step, needs_power_of_two = linear_step, False
+        elif probe == 'swiss':
+            self.probe_function = self.swiss_probe
+            self.probe_step, needs_power_of_two = linear_step, True
+            size = max(size, GROUP_SIZE)
+        elif probe in PROBE_SEQUENCES:
+            self.probe_function = self.sequence_probe
+            self.probe_step, needs_power_of_two = PROBE_SEQUENCES[probe]
+        else:
+            raise ValueError('unknown probe: ' + str(probe))
+
+        self.power_of_two = power_of_two or needs_power_of_two
+        if self.power_of_two:
+            size = 1 << max(size - 1, 0).bit_length()
+        self.allocate(size)
+
+    def allocate(self, size):
+        '''
+        This method replaces the table with an empty one of the given size. Entries are stored in parallel keys,
+        values and hashes lists, where hashes caches the hash of the key in the same slot. Swiss probing also
+        keeps the control bytes in ctrl. A power of two table finds home slots by masking instead of modulo
+        '''
+        self.mask = size - 1 if size & (size - 1) == 0 else None
+        self.ctrl = bytearray([CTRL_EMPTY]) * size if self.probe == 'swiss' else None
+        self.keys = [EMPTY] * size
+        self.values = [None] * size
+        self.hashes = [0] * size
+        self.num_used_slots = 0
+        self.num_tombstones = 0
         
     def hash_key(self, k):
         '''
         Hashes keys
         '''
-        return hash(k) % self.get_size()
+        return self.home_slot(self.hash_function(k))
 
-    def hash2_key(self, k):
+    def home_slot(self, h):
         '''
-        Secondary hash function for double hashing
-        '''
-        return (((k//self.get_size()) % (self.get_size()// 2)) * 2) + 1
-       
-    
-    def convert_probe_function(self, probe, k, hashed_key):
-        '''
-        Converts the probe name into the probe function to be used
+        Returns the slot that a key with full hash h hashes to
         '''
-
-        switcher = {
-            'linear': self.linear_probe(k, hashed_key),
-            'quadratic': self.quadratic_probe(k, hashed_key),
-            'double hashing': self.double_hashing(k, hashed_key)
-        }
-    
-        return switcher.get(probe, 'Error')
+        if self.mask is not None:
+            return h & self.mask
+        return h % len(self.keys)
 
     def get_size(self):
         '''
         Returns the size of the hashtable
         '''
-        return len(self.table)
+        return len(self.keys)
 
     def get_num_used_slots(self):
         '''
         Returns the number of slots/indices in the hashtable that are used
         '''
-        return len(list(filter(lambda elem: len(elem) > 0, self.table)))
+        return self.num_used_slots
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return self.num_used_slots - self.num_tombstones
 
     def need_to_resize(self):
         '''
-        Returns true if needed to resize and false otherwise
+        Returns true if the used slots, counting tombstones since probes have to step over them, are over the
+        policy's max_load and false otherwise
+        '''
+        return self.policy.should_grow(self.get_num_used_slots(), self.get_size())
+
+    def resize(self):
+        '''
+        This method rehashes all of the existing elements into a table of the next size up that the policy grows to,
+        or of the same size if the live entries alone are not over max_load and clearing the tombstones is enough
         '''
         size = self.get_size()
-        slots_used = self.get_num_used_slots()
+        if self.policy.should_grow(self.get_num_entries() + 1, size):
+            size = self.grown_size(size)
+        self.rehash(size)
 
-        if slots_used / size > .75:
-            return True
-        else:
-            return False
+    def grown_size(self, size):
+        '''
+        Returns the size the policy grows a table of size slots to
+        '''
+        return self.policy.grown_size(size, self.power_of_two)
 
-    def resize(self):
+    def shrunk_size(self, size):
         '''
-        This method doubles the old size of the array and rehashes all of the existing elements accordingly
+        Returns the size the policy shrinks a table of size slots to, keeping swiss tables at least one group long
         '''
-        old_table = [num for sublist in self.table for num in sublist]
-        self.table = [[]] * (2 * self.get_size())
+        size = self.policy.shrunk_size(size, self.power_of_two)
+        if self.probe == 'swiss':
+            size = max(size, GROUP_SIZE)
+        return size
 
-        for elem in old_table:
-            self.insert(elem[0], elem[1])
+    def compact(self):
+        '''
+        This method rehashes all of the existing elements into a table of the size the policy picks for the current
+        number of entries, clearing out the tombstones and giving back the memory of a table that deletes have left mostly empty
+        '''
+        size = self.policy.fit_size(self.get_num_entries(), self.get_size(), self.power_of_two)
+        if self.probe == 'swiss':
+            size = max(size, GROUP_SIZE)
+        self.rehash(size)
 
-    def linear_probe(self, k, hashed_key):
+    def shrink_if_needed(self):
         '''
-        This method inserts a key and value using a linear probe 
+        This method shrinks the table after a delete once the policy finds it too empty
         '''
-        while self.table[hashed_key]:
-            if k == self.table[hashed_key][0][0]:
-                return hashed_key
-            else:
-                hashed_key = self.hash_key(hashed_key + 1)
-        
-        return hashed_key
+        size = self.get_size()
+        if self.policy.should_shrink(self.get_num_entries(), size):
+            new_size = self.shrunk_size(size)
+            if new_size < size:
+                self.rehash(new_size)
+
+    def rehash(self, size):
+        '''
+        This method moves all of the existing elements into a new table of the given size, placing each one
+        from its cached hash
+        '''
+        if self.stats_collector is not None:
+            start = time.perf_counter()
+
+        old_keys, old_values, old_hashes = self.keys, self.values, self.hashes
+        self.allocate(size)
+
+        for i in range(len(old_keys)):
+            k = old_keys[i]
+            if k is not EMPTY and k is not DELETED:
+                self.place_hashed(k, old_values[i], old_hashes[i])
+
+        if self.stats_collector is not None:
+            self.stats_collector.record_resize(self, len(old_keys), time.perf_counter() - start)
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable
+        '''
+        return [(k, self.values[i]) for i, k in enumerate(self.keys) if k is not EMPTY and k is not DELETED]
+
+    def freeze(self):
+        '''
+        Returns a FrozenHashTable of the current key value pairs, which can only be searched, with one slot looked at per search
+        '''
+        return FrozenHashTable(self.items())
 
-    def quadratic_probe(self, k, hashed_key):
+    def sequence_probe(self, k, hashed_key, h):
         '''
-        This method inserts a key and value using a quadratic probe
+        This method walks the table's probe sequence from hashed_key, the home slot of key k with full hash h.
+        It returns the slot holding k, or else the first tombstone passed or the empty slot that ended the walk,
+        or None if every step landed on another key
         '''
         i = 0
-        
-        while self.table[hashed_key] and i < self.get_size():
-            i += 1
-            if k == self.table[hashed_key][0][0]:
+        first_tombstone = None
+        size = self.get_size()
+        step = self.probe_step
+
+        while self.keys[hashed_key] is not EMPTY:
+            if k == self.keys[hashed_key]:
+                self.last_probe_length = i
                 return hashed_key
-            else:
-                hashed_key = self.hash_key(hashed_key + i*i)
-        
+            if first_tombstone is None and self.keys[hashed_key] is DELETED:
+                first_tombstone = (hashed_key, i)
+            i += 1
+            if i >= size:
+                break
+            hashed_key = step(hashed_key, i, h, size)
+
+        if first_tombstone is not None:
+            hashed_key, i = first_tombstone
+        elif self.keys[hashed_key] is not EMPTY:
+            hashed_key = None
+        self.last_probe_length = i
         return hashed_key
 
-    def double_hashing(self, k, hashed_key):
+    def swiss_hash(self, h, num_groups):
+        '''
+        Returns the 7 bit tag and first group of a key with hash h. Both come from the high bits of a Fibonacci
+        multiply of h, which depend on every bit of h, where the low bits only depend on the low bits of h: the tag is
+        the top 7 bits and the group is picked by the 57 bits below them
+        '''
+        mixed = ((h & MASK64) * FIBONACCI_MULTIPLIER) & MASK64
+        return mixed >> 57, ((mixed & SWISS_GROUP_BITS) * num_groups) >> 57
+
+    def swiss_probe(self, k, hashed_key, h):
+        '''
+        This method finds a key a group of GROUP_SIZE slots at a time. The key's hash picks its first group and a
+        7 bit tag, and only slots whose control byte equals the tag have their full key compared. The walk moves to
+        the next group until one has an empty slot. It returns the slot holding k, or else the first free slot seen
+        '''
+        num_groups = self.get_size() // GROUP_SIZE
+        tag, group = self.swiss_hash(h, num_groups)
+        ctrl = self.ctrl
+        first_free = None
+        comparisons = 0
+
+        for i in range(num_groups):
+            start = group * GROUP_SIZE
+            end = start + GROUP_SIZE
+
+            candidate = ctrl.find(tag, start, end)
+            while candidate != -1:
+                comparisons += 1
+                if self.keys[candidate] == k:
+                    self.last_probe_length = i
+                    self.last_comparisons = comparisons
+                    return candidate
+                candidate = ctrl.find(tag, candidate + 1, end)
+
+            if first_free is None:
+                deleted = ctrl.find(CTRL_DELETED, start, end)
+                if deleted != -1:
+                    first_free = deleted
+
+            empty = ctrl.find(CTRL_EMPTY, start, end)
+            if empty != -1:
+                if first_free is None:
+                    first_free = empty
+                break
+
+            group = (group + 1) % num_groups
+
+        self.last_probe_length = i
+        self.last_comparisons = comparisons
+        return first_free
+
+    def key_comparisons(self):
         '''
-        This method inserts a key and value using double hashing
+        Returns how many full keys the last probe compared against
         '''
+        if self.ctrl is not None:
+            return self.last_comparisons
+        return self.last_probe_length + 1
 
+    def home_distance(self, slot):
+        '''
+        Returns how many slots the entry at slot sits past the slot its key hashes to
+        '''
+        size = self.get_size()
+        return (slot - self.home_slot(self.hashes[slot])) % size
+
+    def robin_hood_probe(self, k, hashed_key, h):
+        '''
+        This method finds a key using a robin hood probe, returning the slot holding k, or the slot where the
+        search gave up: an empty slot, or one whose entry is closer to its home than k would be
+        '''
         i = 0
-        while self.table[hashed_key] and i < self.get_size():
+        size = self.get_size()
+
+        while self.keys[hashed_key] is not EMPTY and i < size:
+            if k == self.keys[hashed_key]:
+                break
+            if self.home_distance(hashed_key) < i:
+                break
             i += 1
-            if k == self.table[hashed_key][0][0]:
-                return hashed_key
-            else:
-                hashed_key = (self.hash_key(hashed_key) + i * self.hash2_key(hashed_key)) % self.get_size()
+            hashed_key = (hashed_key + 1) % size
+
+        self.last_probe_length = i
         return hashed_key
 
+    def robin_hood_place(self, k, v, h):
+        '''
+        This method inserts a key and value using a robin hood probe. Walking linearly from the home slot, the entry
+        being carried takes the place of any entry that is closer to its own home, which is then carried further along
+        '''
+        size = self.get_size()
+        hashed_key = self.robin_hood_probe(k, self.home_slot(h), h)
+        distance = self.last_probe_length
+
+        if self.keys[hashed_key] is not EMPTY and self.keys[hashed_key] == k:
+            self.values[hashed_key] = v
+            return
+
+        while self.keys[hashed_key] is not EMPTY:
+            resident_distance = self.home_distance(hashed_key)
+            if resident_distance < distance:
+                k, self.keys[hashed_key] = self.keys[hashed_key], k
+                v, self.values[hashed_key] = self.values[hashed_key], v
+                h, self.hashes[hashed_key] = self.hashes[hashed_key], h
+                distance = resident_distance
+            distance += 1
+            hashed_key = (hashed_key + 1) % size
+
+        self.store(hashed_key, k, v, h)
+
+    def store(self, hashed_key, k, v, h):
+        '''
+        This method writes k, v and its hash h into the slot hashed_key, keeping the slot counts up to date
+        '''
+        if self.keys[hashed_key] is EMPTY:
+            self.num_used_slots += 1
+        elif self.keys[hashed_key] is DELETED:
+            self.num_tombstones -= 1
+
+        self.keys[hashed_key] = k
+        self.values[hashed_key] = v
+        self.hashes[hashed_key] = h
+        if self.ctrl is not None:
+            self.ctrl[hashed_key] = self.swiss_hash(h, 1)[0]
+
     def insert(self, k, v):
         '''
         This method inserts the key value pair k, v at the hashtable index, and if key k already exists in the table, replaces the existing value with v
@@ -120,149 +387,248 @@ class OpenHashTable():
         if self.need_to_resize():
             self.resize()
 
-        h_key = self.hash_key(k)
+        self.place(k, v)
 
-        hashed_key = self.convert_probe_function(self.probe, k, h_key)
-        
-        self.table[hashed_key] = [(k,v)]
+        if self.stats_collector is not None:
+            self.stats_collector.record_op(self)
+            self.stats_collector.record_insert_probe(self.last_probe_length)
+            self.stats_collector.comparisons += self.key_comparisons()
+
+    def place(self, k, v):
+        '''
+        This method probes for the slot of key k and stores k, v there without checking whether to resize
+        '''
+        self.place_hashed(k, v, self.hash_function(k))
+
+    def place_hashed(self, k, v, h):
+        '''
+        This method does the work of place for a key whose hash h is already known
+        '''
+        if self.probe == 'robin hood':
+            self.robin_hood_place(k, v, h)
+            return
+
+        hashed_key = self.probe_function(k, self.home_slot(h), h)
+        while hashed_key is None:
+            # the probe sequence never reached a free slot, so grow until it does
+            self.rehash(self.grown_size(self.get_size()))
+            hashed_key = self.probe_function(k, self.home_slot(h), h)
+        self.store(hashed_key, k, v, h)
+
+    @classmethod
+    def from_pairs(cls, pairs, size_hint = None, **kwargs):
+        '''
+        This method builds a new hashtable from an iterable of key value pairs, sizing the table once up front
+        '''
+        table = cls(**kwargs)
+        table.insert_many(pairs, size_hint)
+        return table
+
+    def insert_many(self, pairs, size_hint = None):
+        '''
+        This method inserts every key value pair in pairs, with later pairs replacing earlier ones for the same key.
+        The table is grown once to fit the whole batch, or size_hint keys if that is more, and each key is probed
+        for only once, without going through insert
+        '''
+        # a dict keeps only the last value given for each key
+        pairs = dict(pairs)
+        size_hint = max(size_hint or 0, len(pairs))
+
+        size = self.get_size()
+        slots_used = self.get_num_used_slots()
+        while self.policy.should_grow(slots_used + size_hint, size):
+            size = self.grown_size(size)
+
+        if size != self.get_size():
+            self.rehash(size)
+
+        for k, v in pairs.items():
+            self.place(k, v)
            
     def search(self, k):
         '''
         This method searches the array for a given key and returns the value from that key
         '''
-       
-        h_key = self.hash_key(k)
+        h = self.hash_function(k)
+        hashed_key = self.probe_function(k, self.home_slot(h), h)
 
-        hashed_key = self.convert_probe_function(self.probe, k, h_key)
+        if self.stats_collector is not None:
+            self.stats_collector.record_op(self)
+            self.stats_collector.record_search_probe(self.last_probe_length)
+            self.stats_collector.comparisons += self.key_comparisons()
 
-        if self.table[hashed_key]:
-            return self.table[hashed_key][0][1]
+        if hashed_key is not None and self.keys[hashed_key] is not EMPTY and self.keys[hashed_key] == k:
+            return self.values[hashed_key]
         else:
             return None
-        
-    def print_table(self):
+
+    def search_many(self, keys):
         '''
-        This method prints the hash table
+        This method searches for every key in keys and returns the list of their values, in the same order as keys,
+        looking up the table's attributes once for the whole batch instead of once per key
         '''
-        for item in self.table:
-            print(item)
+        if self.stats_collector is not None:
+            return [self.search(k) for k in keys]
 
-def linear_time(list_size = 1000, table_size = 100):
-    num_runs = 100
-    list_size = list_size
-    table_size = table_size
+        hash_function, probe_function, home_slot = self.hash_function, self.probe_function, self.home_slot
+        table_keys, values = self.keys, self.values
+        results = []
+        for k in keys:
+            h = hash_function(k)
+            hashed_key = probe_function(k, home_slot(h), h)
+            if hashed_key is not None and table_keys[hashed_key] is not EMPTY and table_keys[hashed_key] == k:
+                results.append(values[hashed_key])
+            else:
+                results.append(None)
+        return results
 
-    SETUP = '''from __main__ import OpenHashTable
-from random import random
-my_list = [(int(random()*10000), "value") for n in range(list_size)]
-table = OpenHashTable(table_size)
+    def delete(self, k):
         '''
-    CODE = '''
-for pair in my_list:
-    table.insert(pair[0],pair[1])
+        This method deletes the key k if it exists. With robin hood probing, the entries after it are shifted back
+        one slot until an empty slot or an entry already in its home slot, so no tombstone is left behind
         '''
-    times = timeit.timeit(setup = SETUP, stmt = CODE, globals = locals(), number = num_runs)
-    return times/num_runs
+        if self.probe != 'robin hood':
+            self.tombstone_delete(k)
+            return
 
-def quadratic_time(list_size = 1000, table_size = 100):
-    num_runs = 100
-    list_size = list_size
-    table_size = table_size
-    print('here')
+        size = self.get_size()
+        h = self.hash_function(k)
+        hashed_key = self.robin_hood_probe(k, self.home_slot(h), h)
+        if self.keys[hashed_key] is EMPTY or self.keys[hashed_key] != k:
+            return None
 
-    SETUP = '''from __main__ import OpenHashTable
-from random import random
-my_list = [(int(random()*10000), "value") for n in range(list_size)]
-table = OpenHashTable(table_size, probe = 'quadratic')
+        next_key = (hashed_key + 1) % size
+        while self.keys[next_key] is not EMPTY and self.home_distance(next_key) > 0:
+            self.keys[hashed_key] = self.keys[next_key]
+            self.values[hashed_key] = self.values[next_key]
+            self.hashes[hashed_key] = self.hashes[next_key]
+            hashed_key = next_key
+            next_key = (next_key + 1) % size
+
+        self.keys[hashed_key] = EMPTY
+        self.values[hashed_key] = None
+        self.num_used_slots -= 1
+        self.shrink_if_needed()
+
+    def tombstone_delete(self, k):
         '''
-    CODE = '''
-for pair in my_list:
-    table.insert(pair[0],pair[1])
+        This method deletes the key k if it exists by leaving a tombstone in its slot. The table shrinks once the
+        policy finds it too empty, and is compacted once the share of tombstones passes tombstone_threshold
         '''
-    times = timeit.timeit(setup = SETUP, stmt = CODE, globals = locals(), number = num_runs)
-    return times/num_runs
+        h = self.hash_function(k)
+        hashed_key = self.probe_function(k, self.home_slot(h), h)
+        if hashed_key is None or self.keys[hashed_key] is EMPTY or self.keys[hashed_key] != k:
+            return None
 
-def double_hash_time(list_size = 1000, table_size = 100):
-    num_runs = 100
-    list_size = list_size
-    table_size = table_size
+        self.keys[hashed_key] = DELETED
+        self.values[hashed_key] = None
+        self.num_tombstones += 1
+        if self.ctrl is not None:
+            self.ctrl[hashed_key] = CTRL_DELETED
 
-    SETUP = '''from __main__ import OpenHashTable
-from random import random
-my_list = [(int(random()*10000), "value") for n in range(list_size)]
-table = OpenHashTable(table_size, probe = 'double hashing')
+        size = self.get_size()
+        self.shrink_if_needed()
+        if self.get_size() == size and self.num_tombstones / size > self.tombstone_threshold:
+            self.compact()
+
+    def probe_distance(self, k):
         '''
-    CODE = '''
-for pair in my_list:
-    table.insert(pair[0],pair[1])
+        Returns the number of probe steps a search for key k takes past its home slot
         '''
-    times = timeit.timeit(setup = SETUP, stmt = CODE, globals = locals(), number = num_runs)
-    return times/num_runs
+        h = self.hash_function(k)
+        self.probe_function(k, self.home_slot(h), h)
+        return self.last_probe_length
 
-def close_hash_time(list_size = 1000, table_size = 100):
-    num_runs = 100
-    list_size = list_size
-    table_size = table_size
-    print(list_size)
+    def get_probe_distances(self):
+        '''
+        Returns the probe distance of every key in the hashtable
+        '''
+        return [self.probe_distance(item[0]) for item in self.items()]
 
-    SETUP = '''from hashtable import HashTable
-from random import random
-my_list = [(int(random()*10000), "value") for n in range(list_size)]
-table = HashTable(table_size)
+    def max_probe_distance(self):
         '''
-    CODE = '''
-for pair in my_list:
-    table.insert(pair[0],pair[1])
+        Returns the longest probe distance of any key in the hashtable
         '''
-    times = timeit.timeit(setup = SETUP, stmt = CODE, globals = locals(), number = num_runs)
-    return times/num_runs
+        return max(self.get_probe_distances(), default = 0)
+
+    def mean_probe_distance(self):
+        '''
+        Returns the average probe distance of the keys in the hashtable
+        '''
+        distances = self.get_probe_distances()
+        if not distances:
+            return 0
+        return sum(distances) / len(distances)
+
+    def stats(self):
+        '''
+        Returns a dictionary of the statistics recorded so far, or None if the table was not created with stats = True.
+        Comparisons are counted as the probe steps of each insert and search plus one, or for swiss probing as the
+        full keys compared
+        '''
+        if self.stats_collector is None:
+            return None
+
+        result = self.stats_collector.to_dict()
+        result['size'] = self.get_size()
+        result['used_slots'] = self.get_num_used_slots()
+        result['entries'] = self.get_num_entries()
+        result['tombstones'] = self.num_tombstones
+        return result
+
+    def dump_stats(self, file):
+        '''
+        Writes the result of stats() to file, which is either a path or an open text file, as JSON
+        '''
+        dump_stats(self.stats(), file)
+
+    def print_table(self):
+        '''
+        This method prints the hash table
+        '''
+        for i, k in enumerate(self.keys):
+            if k is EMPTY:
+                print([])
+            elif k is DELETED:
+                print('[deleted]')
+            else:
+                print([(k, self.values[i])])
+
+def compare_probe_distances(list_size = 1000, table_size = 100):
+    '''
+    Prints the max and mean probe distance of each probe mode after inserting the same random keys
+    '''
+    my_list = [(int(random()*10000), "value") for n in range(list_size)]
+
+    for probe in ['linear', 'quadratic', 'double hashing', 'triangular', 'robin hood']:
+        table = OpenHashTable(table_size, probe = probe)
+        for pair in my_list:
+            table.insert(pair[0], pair[1])
+        print('%s: max %d, mean %.2f' % (probe, table.max_probe_distance(), table.mean_probe_distance()))
+
+def compare_key_comparisons(table_size = 1024, load = .7):
+    '''
+    Prints the average number of full key comparisons per search for each probe mode, looking up the inserted keys
+    and as many missing keys in a table filled to the given load factor
+    '''
+    my_list = [(int(random()*2**32), "value") for n in range(int(table_size * load))]
+
+    for probe in ['linear', 'quadratic', 'double hashing', 'triangular', 'robin hood', 'swiss']:
+        table = OpenHashTable(table_size, probe = probe, stats = True)
+        table.insert_many(my_list)
+        searches = table.stats()['operations']
+        comparisons = table.stats()['comparisons']
+        for pair in my_list:
+            table.search(pair[0])
+            table.search(pair[0] + 2**32)
+        searches = table.stats()['operations'] - searches
+        comparisons = table.stats()['comparisons'] - comparisons
+        print('%s: %.2f comparisons per search' % (probe, comparisons / searches))
 
 if __name__ == "__main__":
 
-    # print('linear: ' + str(linear_time()))
-    # print('quadratic: ' + str(quadratic_time()))
-    # print('double hashing: ' + str(double_hash_time()))
-    # print('close hash time: ' + str(close_hash_time()))
-
-    lin_table_times = []
-    quad_table_times = []
-    double_table_times = []
-    close_table_times = []
-
-    # change inital table size
-    for i in range (10, 1000, 20):
-        lin_table_times.append([i, linear_time(table_size = i)])
-        quad_table_times.append([i, quadratic_time(table_size = i)])
-        double_table_times.append([i, double_hash_time(table_size = i)])
-        close_table_times.append([i, close_hash_time(table_size = i)])
-    
-    plt.plot([item[0] for item in lin_table_times], [item[1] for item in lin_table_times], label = "linear probing")
-    plt.plot([item[0] for item in quad_table_times],[item[1] for item in quad_table_times], label = "quadratic probing")
-    plt.plot([item[0] for item in double_table_times], [item[1] for item in double_table_times], label = "double hashing")
-    plt.plot([item[0] for item in close_table_times], [item[1] for item in close_table_times], label = "closed hashing")
-    plt.legend()
-    plt.savefig('table_size.png')
-
-    lin_list_times = []
-    quad_list_times = []
-    double_list_times = []
-    close_list_times = []
-
-    # change inital list size
-    for i in range (100, 10000, 50):
-        lin_list_times.append([i, linear_time(list_size = i)])
-        quad_list_times.append([i, quadratic_time(list_size = i)])
-        double_list_times.append([i, double_hash_time(list_size = i)])
-        close_list_times.append([i, close_hash_time(list_size = i)])
-        
-    plt.plot([item[0] for item in lin_list_times], [item[1] for item in lin_list_times], label = "linear probing")
-    plt.plot([item[0] for item in quad_list_times],[item[1] for item in quad_list_times], label = "quadratic probing")
-    plt.plot([item[0] for item in double_list_times], [item[1] for item in double_list_times], label = "double hashing")
-    plt.plot([item[0] for item in close_list_times], [item[1] for item in close_list_times], label = "closed hashing")
-    plt.legend()
-    plt.savefig('list_size.png')
-    
-    
+    compare_probe_distances()
+    compare_key_comparisons()
 
     # table1 = OpenHashTable(10, probe = 'double hashing')
     # table1.insert(1, "hello")
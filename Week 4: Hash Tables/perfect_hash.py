@@ -0,0 +1,238 @@
+'''
+This is an implementation of a read-only Hash Table built with a minimal perfect hash function, in the style of
+PTHash. The n keys are hashed into about n / bucket_load buckets, and each bucket is given a small number, its pilot,
+chosen so that hashing the bucket's keys together with the pilot puts them in slots no other key has taken. Pilots
+are searched for over n / load slots, a few more than n, since filling the very last free slots takes the longest,
+and the keys that land past slot n are then moved into the slots left empty below it through a small remap array.
+The n keys sit in exactly n slots with none left empty, and a search hashes the key, reads its bucket's pilot and
+looks at one slot. The pilots and the remap array are all the table stores besides the keys and values, and each is
+kept in the smallest array type that holds its largest value
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import random
+import time
+from array import array
+
+from hash_functions import FIBONACCI_MULTIPLIER, MASK64, get_hash_function
+
+# a bucket that no pilot below MAX_PILOT can place means the build starts over with another seed
+MAX_PILOT = 1 << 16
+MAX_ATTEMPTS = 100
+
+# PTHash's skewed bucket sizes: 60% of the keys go to 30% of the buckets
+DENSE_KEYS = .6
+DENSE_BUCKETS = .3
+DENSE_KEYS_THRESHOLD = int(DENSE_KEYS * (1 << 32))
+
+def smallest_array(values):
+    '''
+    Returns an array of the non-negative ints in values with the smallest item size that holds all of them
+    '''
+    largest = max(values, default = 0)
+    for typecode in 'BHIL':
+        if largest < 1 << (8 * array(typecode).itemsize):
+            return array(typecode, values)
+    return array('Q', values)
+
+class FrozenHashTable():
+    def __init__(self, pairs, bucket_load = 4, load = .99, hash_function = 'multiply shift', seed = None):
+        '''
+        This method builds the table from an iterable of key value pairs, with later pairs replacing earlier ones
+        for the same key. hash_function is the name of a family in hash_functions.HASH_FUNCTIONS, since a build
+        that fails is retried with a new seed
+        '''
+        start = time.perf_counter()
+        pairs = dict(pairs)
+        self.size = len(pairs)
+        self.num_slots = max(self.size, int(self.size / load))
+        self.num_buckets = max(2, -(-self.size // bucket_load))
+        self.num_dense_buckets = max(1, int(self.num_buckets * DENSE_BUCKETS))
+        rng = random.Random(seed)
+
+        for attempt in range(MAX_ATTEMPTS):
+            self.hash_function = get_hash_function(hash_function, rng.getrandbits(64))
+            if self.build(pairs):
+                break
+        else:
+            raise ValueError('could not find a perfect hash for the keys, some of them may have equal hashes')
+
+        self.attempts = attempt + 1
+        self.build_seconds = time.perf_counter() - start
+
+    def bucket_of(self, h):
+        '''
+        Returns the bucket of a key with hash h. The low 32 bits of the hash send DENSE_KEYS of the keys to the first
+        DENSE_BUCKETS of the buckets, so there are a few large buckets to place while the table is empty and many
+        small ones to fill in the last free slots, and the top 32 bits pick a bucket within that part
+        '''
+        if h & 0xFFFFFFFF < DENSE_KEYS_THRESHOLD:
+            return ((h >> 32) * self.num_dense_buckets) >> 32
+        return self.num_dense_buckets + (((h >> 32) * (self.num_buckets - self.num_dense_buckets)) >> 32)
+
+    def slot_of(self, h, pilot):
+        '''
+        Returns the slot, out of num_slots, of a key with hash h in a bucket with the given pilot
+        '''
+        return ((((h ^ (pilot * FIBONACCI_MULTIPLIER)) * FIBONACCI_MULTIPLIER) & MASK64) * self.num_slots) >> 64
+
+    def final_slot(self, h):
+        '''
+        Returns the slot of the keys and values arrays that holds the key with hash h
+        '''
+        slot = self.slot_of(h, self.pilots[self.bucket_of(h)])
+        if slot >= self.size:
+            slot = self.remap[slot - self.size]
+        return slot
+
+    def build(self, pairs):
+        '''
+        This method finds a pilot for every bucket, largest buckets first while the most slots are free, and places
+        the pairs. Returns false if two keys have equal hashes or a bucket needs a pilot of MAX_PILOT or more
+        '''
+        hashes = [self.hash_function(k) for k in pairs]
+        if len(set(hashes)) != len(hashes):
+            return False
+
+        buckets = [[] for i in range(self.num_buckets)]
+        for h in hashes:
+            buckets[self.bucket_of(h)].append(h)
+
+        taken = bytearray(self.num_slots)
+        pilots = [0] * self.num_buckets
+        for bucket in sorted(range(self.num_buckets), key = lambda b: len(buckets[b]), reverse = True):
+            members = buckets[bucket]
+            if not members:
+                break
+
+            for pilot in range(MAX_PILOT):
+                # most pilots are ruled out by their first slot or two, so the slots are checked as they are made
+                slots = []
+                for h in members:
+                    slot = self.slot_of(h, pilot)
+                    if taken[slot] or slot in slots:
+                        break
+                    slots.append(slot)
+                else:
+                    break
+            else:
+                return False
+
+            for slot in slots:
+                taken[slot] = 1
+            pilots[bucket] = pilot
+
+        # each taken slot past the end is paired with an empty slot below it, and there are as many of one as the other
+        empty = (slot for slot in range(self.size) if not taken[slot])
+        remap = [next(empty) if taken[slot] else 0 for slot in range(self.size, self.num_slots)]
+        self.pilots = smallest_array(pilots)
+        self.remap = smallest_array(remap)
+
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        for h, (k, v) in zip(hashes, pairs.items()):
+            slot = self.final_slot(h)
+            self.keys[slot] = k
+            self.values[slot] = v
+        return True
+
+    def get_size(self):
+        '''
+        Returns the number of slots in the hashtable, which is also its number of key value pairs
+        '''
+        return self.size
+
+    def get_num_entries(self):
+        '''
+        Returns the number of key value pairs in the hashtable
+        '''
+        return self.size
+
+    def __len__(self):
+        return self.size
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key, looking at exactly one slot
+        '''
+        if not self.size:
+            return None
+        # final_slot written out, since searches are all this table is for
+        h = self.hash_function(k)
+        if h & 0xFFFFFFFF < DENSE_KEYS_THRESHOLD:
+            bucket = ((h >> 32) * self.num_dense_buckets) >> 32
+        else:
+            bucket = self.num_dense_buckets + (((h >> 32) * (self.num_buckets - self.num_dense_buckets)) >> 32)
+        slot = ((((h ^ (self.pilots[bucket] * FIBONACCI_MULTIPLIER)) * FIBONACCI_MULTIPLIER) & MASK64) * self.num_slots) >> 64
+        if slot >= self.size:
+            slot = self.remap[slot - self.size]
+        if self.keys[slot] == k:
+            return self.values[slot]
+        return None
+
+    def items(self):
+        '''
+        Returns a list of the key value pairs in the hashtable
+        '''
+        return list(zip(self.keys, self.values))
+
+    def bits_per_key(self):
+        '''
+        Returns the bits the pilot and remap arrays take per key, the cost of the perfect hash function on top of the
+        keys and values
+        '''
+        return (len(self.pilots) * self.pilots.itemsize + len(self.remap) * self.remap.itemsize) * 8 / max(self.size, 1)
+
+    def stats(self):
+        '''
+        Returns a dictionary describing the built table
+        '''
+        return {
+            'size': self.size,
+            'entries': self.size,
+            'buckets': self.num_buckets,
+            'remapped_slots': len(self.remap),
+            'max_pilot': max(self.pilots),
+            'bits_per_key': self.bits_per_key(),
+            'build_seconds': self.build_seconds,
+            'attempts': self.attempts
+        }
+
+def compare_lookups(num_keys = 100000, num_searches = 200000):
+    '''
+    Prints the build time and bits per key of freezing a HashTable and an OpenHashTable, and the search speed of
+    each table before and after freezing, for searches that all hit
+    '''
+    from hashtable import HashTable
+    from open_hash_table import OpenHashTable
+
+    rng = random.Random(0)
+    keys = rng.sample(range(2**62), num_keys)
+    searches = [rng.choice(keys) for i in range(num_searches)]
+
+    for name, table in [('HashTable', HashTable()), ('OpenHashTable', OpenHashTable())]:
+        for k in keys:
+            table.insert(k, k)
+        frozen = table.freeze()
+        print('%s: frozen in %.2fs, %.2f bits per key, max pilot %d' % (name, frozen.build_seconds, frozen.bits_per_key(), max(frozen.pilots)))
+
+        for label, structure in [(name, table), ('frozen', frozen)]:
+            start = time.perf_counter()
+            for k in searches:
+                structure.search(k)
+            print('    %-14s %.0f searches/s' % (label, num_searches / (time.perf_counter() - start)))
+
+if __name__ == "__main__":
+    table1 = FrozenHashTable([(i, 'value ' + str(i)) for i in range(10)] + [('ten', 10)])
+    print(table1.search(3))
+    print(table1.search('ten'))
+    print(table1.search(11))
+    print(table1.stats())
+
+    # (-1,) and (-2,) have equal Python hashes but are different keys
+    table2 = FrozenHashTable([((-1,), 'minus one'), ((-2,), 'minus two'), ('a', 'str'), (b'a', 'bytes')])
+    assert table2.search((-1,)) == 'minus one' and table2.search((-2,)) == 'minus two'
+    assert table2.search('a') == 'str' and table2.search(b'a') == 'bytes'
+    print(table2.search((-2,)), table2.search(b'a'))
+
+    compare_lookups()
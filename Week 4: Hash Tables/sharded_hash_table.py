@@ -0,0 +1,201 @@
+'''
+This is an implementation of a Hash Table split into shards that each live in their own worker process, so batches
+of searches and inserts can use several cores. Keys are assigned to shards by the top bits of a multiply-shift
+mix of their hash, and each batch is split into one request per shard that the workers handle at the same time
+
+More Information: https://rpucella.net/other/is-dsa-sp22/
+'''
+import multiprocessing
+import os
+import random
+import time
+
+from hash_functions import FIBONACCI_MULTIPLIER, MASK64
+from hashtable import HashTable
+from open_hash_table import OpenHashTable
+
+TABLE_CLASSES = {
+    'chained': HashTable,
+    'open': OpenHashTable
+}
+
+def shard_worker(conn, table_class, table_kwargs):
+    '''
+    Runs in a worker process, answering requests from conn against its own table until it receives 'close'.
+    It first sends None once its table is built, or the exception that stopped it from being built, and an
+    exception raised by the table is sent back in place of the answer
+    '''
+    try:
+        table = TABLE_CLASSES[table_class](**table_kwargs)
+    except Exception as e:
+        conn.send(e)
+        conn.close()
+        return
+    conn.send(None)
+
+    while True:
+        op, payload = conn.recv()
+        if op == 'close':
+            conn.close()
+            return
+
+        try:
+            if op == 'insert_many':
+                table.insert_many(payload)
+                conn.send(None)
+            elif op == 'search_many':
+                conn.send(table.search_many(payload))
+        except Exception as e:
+            conn.send(e)
+
+class ShardedHashTable():
+    def __init__(self, num_shards = None, table_class = 'open', **table_kwargs):
+        '''
+        This method starts num_shards worker processes (one per core by default), each owning a table_class table
+        built with table_kwargs, and waits until every worker has built its table. If one of them could not, the
+        workers are stopped and its exception is raised here
+        '''
+        self.num_shards = num_shards or os.cpu_count()
+        self.connections = []
+        self.workers = []
+
+        for i in range(self.num_shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target = shard_worker, args = (child_conn, table_class, table_kwargs), daemon = True)
+            worker.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.workers.append(worker)
+
+        errors = []
+        for shard in range(self.num_shards):
+            try:
+                self.receive(shard)
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            self.close()
+            raise errors[0]
+
+    def get_shard(self, k):
+        '''
+        Returns the shard that owns key k. The shard comes from the top bits of the mixed hash, since the workers'
+        tables pick buckets from the low bits of hash(k), and a shard picked from those same bits would only ever
+        use 1 / num_shards of its buckets
+        '''
+        return ((((hash(k) & MASK64) * FIBONACCI_MULTIPLIER) & MASK64) * self.num_shards) >> 64
+
+    def receive(self, shard):
+        '''
+        Returns the answer from a shard's worker, raising the exception it sent instead if its request failed
+        '''
+        answer = self.connections[shard].recv()
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def insert_many(self, pairs):
+        '''
+        This method inserts every key value pair in pairs, sending each shard its part of the batch at once and
+        waiting until all of them have been stored
+        '''
+        groups = [[] for i in range(self.num_shards)]
+        for pair in pairs:
+            groups[self.get_shard(pair[0])].append(pair)
+
+        for shard, group in enumerate(groups):
+            if group:
+                self.connections[shard].send(('insert_many', group))
+        errors = []
+        for shard, group in enumerate(groups):
+            if group:
+                try:
+                    self.receive(shard)
+                except Exception as e:
+                    errors.append(e)
+        # every shard's answer is read before raising so that none is left behind in a pipe
+        if errors:
+            raise errors[0]
+
+    def search_many(self, keys):
+        '''
+        This method searches for every key in keys and returns the list of their values, in the same order as keys
+        '''
+        groups = [[] for i in range(self.num_shards)]
+        positions = [[] for i in range(self.num_shards)]
+        for position, k in enumerate(keys):
+            shard = self.get_shard(k)
+            groups[shard].append(k)
+            positions[shard].append(position)
+
+        for shard, group in enumerate(groups):
+            if group:
+                self.connections[shard].send(('search_many', group))
+
+        results = [None] * len(keys)
+        errors = []
+        for shard, group in enumerate(groups):
+            if group:
+                try:
+                    values = self.receive(shard)
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                for position, value in zip(positions[shard], values):
+                    results[position] = value
+        if errors:
+            raise errors[0]
+        return results
+
+    def insert(self, k, v):
+        '''
+        This method inserts the key value pair k, v, and if key k already exists in the table, replaces the existing value with v
+        '''
+        self.insert_many([(k, v)])
+
+    def search(self, k):
+        '''
+        This method searches the table for a given key and returns the value from that key
+        '''
+        return self.search_many([k])[0]
+
+    def close(self):
+        '''
+        This method stops the worker processes, including any that have already exited
+        '''
+        for conn in self.connections:
+            try:
+                conn.send(('close', None))
+            except OSError:
+                # the worker is gone, so there is no one to tell
+                pass
+            conn.close()
+        for worker in self.workers:
+            worker.join()
+        self.connections = []
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+if __name__ == "__main__":
+    num_pairs = 10**6
+    pairs = [(random.randrange(2**62), i) for i in range(num_pairs)]
+    keys = [pair[0] for pair in pairs]
+
+    num_shards = 1
+    while num_shards <= os.cpu_count():
+        with ShardedHashTable(num_shards) as table:
+            start = time.perf_counter()
+            table.insert_many(pairs)
+            insert_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            table.search_many(keys)
+            search_time = time.perf_counter() - start
+
+        print('%d shards: insert_many %.0f ops/s, search_many %.0f ops/s' % (num_shards, num_pairs / insert_time, num_pairs / search_time))
+        num_shards *= 2